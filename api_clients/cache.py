@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+import metrics
+from api_clients.persistent_cache import get_persistent_cache
+from api_clients.resilience import UpstreamUnavailable
+
+log = logging.getLogger(__name__)
+
+Fetch = Callable[[], Awaitable[Any]]
+
+LOOKUPS = metrics.counter("geolive_cache_lookups_total", "Response cache lookups.", ["cache", "result"])
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+    ttl: float | None  # None = never expires
+
+
+class AsyncTTLCache:
+    """
+    Bounded in-memory cache for upstream responses.
+
+    Concurrent misses for the same key share one in-flight fetch, and entries
+    past their TTL but inside ``stale_ttl`` are served immediately while a
+    background refresh replaces them. With ``persist`` set, misses consult
+    and fills write through to the on-disk cache under that namespace.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        *,
+        persist: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.persist = persist
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Fetch,
+        *,
+        ttl: float | None,
+        stale_ttl: float = 0.0,
+    ) -> Any:
+        entry = self._entries.get(key)
+        cache = self.persist or "memory"
+        if entry is not None:
+            age = self._clock() - entry.stored_at
+            if entry.ttl is None or age < entry.ttl:
+                self._entries.move_to_end(key)
+                LOOKUPS.inc(cache=cache, result="hit")
+                return entry.value
+            if age < entry.ttl + stale_ttl:
+                self._refresh_in_background(key, fetch, ttl)
+                LOOKUPS.inc(cache=cache, result="stale")
+                return entry.value
+        LOOKUPS.inc(cache=cache, result="miss")
+        task = self._start(key, fetch, ttl)
+        # Shield so one cancelled caller does not abort the fetch others are awaiting.
+        try:
+            return await asyncio.shield(task)
+        except UpstreamUnavailable:
+            # The upstream's circuit is open; an expired answer beats an error.
+            if entry is None:
+                raise
+            log.info("Serving expired cache entry for %r while upstream is unavailable", key)
+            return entry.value
+
+    def peek(self, key: Hashable) -> Any:
+        """
+        Return a fresh cached value without fetching, or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or (entry.ttl is not None and self._clock() - entry.stored_at >= entry.ttl):
+            return None
+        return entry.value
+
+    async def put(self, key: Hashable, value: Any, *, ttl: float | None) -> None:
+        self._store(key, value, ttl)
+        await self._persist(key, value, ttl)
+
+    async def warm(self, limit: int | None = None) -> int:
+        """
+        Load the most recently used persisted entries into memory.
+
+        Only the SQLite read runs in a thread; entries are applied on the event
+        loop, behind everything already in memory, and never replace a key
+        fetched live since startup.
+        """
+        if not self.persist:
+            return 0
+        entries = await asyncio.to_thread(get_persistent_cache().recent, self.persist, limit or self.max_entries)
+        warmed = 0
+        # Most recent first; each goes to the LRU end, so the order is preserved.
+        for key, value, remaining in entries:
+            if key in self._entries:
+                continue
+            self._entries[key] = _Entry(value=value, stored_at=self._clock(), ttl=remaining)
+            self._entries.move_to_end(key, last=False)
+            warmed += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return warmed
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _start(self, key: Hashable, fetch: Fetch, ttl: float | None) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, fetch, ttl))
+            self._inflight[key] = task
+        return task
+
+    def _refresh_in_background(self, key: Hashable, fetch: Fetch, ttl: float | None) -> None:
+        if key in self._inflight:
+            return
+        task = self._start(key, fetch, ttl)
+        task.add_done_callback(self._log_refresh_failure)
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("Background cache refresh failed: %s", task.exception())
+
+    async def _run(self, key: Hashable, fetch: Fetch, ttl: float | None) -> Any:
+        try:
+            if self.persist and key not in self._entries:
+                hit = await self._load_persisted(key)
+                if hit is not None:
+                    value, remaining = hit
+                    self._store(key, value, remaining)
+                    return value
+            value = await fetch()
+            self._store(key, value, ttl)
+            await self._persist(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load_persisted(self, key: Hashable) -> Any:
+        try:
+            return await asyncio.to_thread(get_persistent_cache().get, self.persist, key)
+        except Exception as exc:
+            log.warning("Persistent cache read failed: %s", exc)
+            return None
+
+    async def _persist(self, key: Hashable, value: Any, ttl: float | None) -> None:
+        if not self.persist:
+            return
+        try:
+            await asyncio.to_thread(get_persistent_cache().put, self.persist, key, value, ttl)
+        except Exception as exc:
+            log.warning("Persistent cache write failed: %s", exc)
+
+    def _store(self, key: Hashable, value: Any, ttl: float | None) -> None:
+        self._entries[key] = _Entry(value=value, stored_at=self._clock(), ttl=ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
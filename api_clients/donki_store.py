@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+DB_PATH = Path("data/donki.db")
+
+Notification = Dict[str, Any]
+
+
+def parse_issue_time(value: Any) -> dt.datetime | None:
+    """
+    DONKI's ``messageIssueTime`` ("2024-05-10T17:02Z") as an aware UTC datetime.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        issued = dt.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if issued.tzinfo is None:
+        issued = issued.replace(tzinfo=dt.timezone.utc)
+    return issued.astimezone(dt.timezone.utc)
+
+
+class NotificationStore:
+    """
+    DONKI notifications in SQLite, keyed by ``messageID``.
+
+    Rows are indexed by issue time and by message type, so the newest
+    notifications of any type and time range come straight from disk. All
+    processes sharing ``data/`` read the same store, whichever one syncs it.
+    """
+
+    def __init__(self, path: Path = DB_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS notification ("
+                "message_id TEXT PRIMARY KEY, message_type TEXT NOT NULL, "
+                "issued_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_notification_issued ON notification (issued_at)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_notification_type ON notification (message_type, issued_at)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM notification").fetchone()[0]
+
+    def upsert(self, items: Iterable[Notification]) -> int:
+        """
+        Insert or replace notifications; returns how many were not stored before.
+        """
+        rows = []
+        for item in items:
+            message_id = item.get("messageID")
+            issued = parse_issue_time(item.get("messageIssueTime"))
+            if not message_id or issued is None:
+                continue
+            rows.append(
+                (message_id, item.get("messageType") or "Info", issued.timestamp(), json.dumps(item, separators=(",", ":")))
+            )
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO notification (message_id, message_type, issued_at, payload) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            added = self._conn.total_changes - before
+            # Revised messages keep their id; refresh them in place.
+            self._conn.executemany(
+                "UPDATE notification SET message_type = ?, issued_at = ?, payload = ? WHERE message_id = ? AND payload != ?",
+                [(kind, issued_at, payload, message_id, payload) for message_id, kind, issued_at, payload in rows],
+            )
+        return added
+
+    def last_issued(self) -> dt.datetime | None:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(issued_at) FROM notification").fetchone()
+        return dt.datetime.fromtimestamp(row[0], dt.timezone.utc) if row[0] is not None else None
+
+    def newest(
+        self,
+        limit: int = 3,
+        *,
+        types: Sequence[str] | None = None,
+        since: dt.datetime | None = None,
+        until: dt.datetime | None = None,
+    ) -> List[Notification]:
+        """
+        Up to ``limit`` notifications, newest first, optionally of the given
+        ``messageType`` values and issued within ``[since, until]``.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if types:
+            clauses.append(f"message_type IN ({', '.join('?' for _ in types)})")
+            params.extend(types)
+        if since is not None:
+            clauses.append("issued_at >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("issued_at <= ?")
+            params.append(until.timestamp())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload FROM notification {where} ORDER BY issued_at DESC, message_id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def prune(self, older_than: dt.datetime) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM notification WHERE issued_at < ?", (older_than.timestamp(),))
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM notification")
+
+
+_store: NotificationStore | None = None
+
+
+def get_store() -> NotificationStore:
+    global _store
+    if _store is None:
+        _store = NotificationStore()
+    return _store
+
+
+def configure(*, path: Path = DB_PATH) -> NotificationStore:
+    global _store
+    _store = NotificationStore(path)
+    return _store
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import httpx
+
+_FEATURES_START = re.compile(r'"features"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+
+
+class GeoJSONStreamError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class FeatureFilter:
+    """
+    Cheap checks applied to each raw feature before it is turned into a record.
+
+    ``bbox`` is ``(min_lon, min_lat, max_lon, max_lat)``; a box whose
+    ``min_lon`` is greater than its ``max_lon`` wraps across the antimeridian.
+    """
+
+    min_magnitude: float | None = None
+    bbox: Tuple[float, float, float, float] | None = None
+
+    def __bool__(self) -> bool:
+        return self.min_magnitude is not None or self.bbox is not None
+
+    def accepts(self, feature: Dict[str, Any]) -> bool:
+        if self.min_magnitude is not None:
+            mag = feature.get("properties", {}).get("mag")
+            if not isinstance(mag, (int, float)) or mag < self.min_magnitude:
+                return False
+        if self.bbox is not None:
+            coords = feature.get("geometry", {}).get("coordinates") or ()
+            if len(coords) < 2 or coords[0] is None or coords[1] is None:
+                return False
+            lon, lat = coords[0], coords[1]
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            if not min_lat <= lat <= max_lat:
+                return False
+            in_lon = min_lon <= lon <= max_lon if min_lon <= max_lon else lon >= min_lon or lon <= max_lon
+            if not in_lon:
+                return False
+        return True
+
+
+class FeatureStream:
+    """
+    Incremental parser for the ``features`` array of a GeoJSON FeatureCollection.
+
+    Text is fed in arbitrary chunks; each complete feature object is decoded
+    on its own with ``raw_decode`` and the consumed text is dropped, so peak
+    memory is one chunk plus one feature rather than the whole document and
+    every feature at once. Members other than ``features`` are skipped.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._in_features = False
+        self._done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        if self._done:
+            return []
+        self._buffer += text
+        if not self._in_features:
+            match = _FEATURES_START.search(self._buffer)
+            if match is None:
+                # Keep only a tail long enough to hold a split '"features": [' marker.
+                self._buffer = self._buffer[-64:]
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._in_features = True
+
+        features: List[Dict[str, Any]] = []
+        buffer, pos = self._buffer, 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._done = True
+                pos = len(buffer)
+                break
+            try:
+                feature, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Incomplete object: wait for the next chunk.
+                break
+            features.append(feature)
+            pos = end
+        self._buffer = buffer[pos:]
+        return features
+
+    def close(self) -> None:
+        if not self._done:
+            if self._in_features and self._buffer.strip():
+                raise GeoJSONStreamError("GeoJSON stream ended inside the features array.")
+            if not self._in_features:
+                raise GeoJSONStreamError("GeoJSON stream has no features array.")
+            raise GeoJSONStreamError("GeoJSON stream ended before the features array was closed.")
+
+
+def iter_features(
+    chunks: Iterable[str], where: FeatureFilter | None = None
+) -> Iterator[Dict[str, Any]]:
+    stream = FeatureStream()
+    for chunk in chunks:
+        for feature in stream.feed(chunk):
+            if not where or where.accepts(feature):
+                yield feature
+    stream.close()
+
+
+async def stream_records(
+    response: httpx.Response,
+    parse: Callable[[Dict[str, Any]], Dict[str, Any]],
+    where: FeatureFilter | None = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield ``parse(feature)`` for each accepted feature of a streamed response body.
+    """
+    stream = FeatureStream()
+    async for chunk in response.aiter_text():
+        for feature in stream.feed(chunk):
+            if not where or where.accepts(feature):
+                yield parse(feature)
+    stream.close()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+import httpx
+
+from config import Settings
+
+DEFAULT_TIMEOUT = 10
+USER_AGENT = "GeoLive-Bot"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClients:
+    """
+    One pooled ``httpx.AsyncClient`` per upstream, kept alive across commands.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # HTTP/2 needs the optional ``h2`` package; fall back to HTTP/1.1 without it.
+        self._http2 = http2 and _http2_available()
+        self._timeout = timeout
+        # Lets benchmarks route every upstream through a local stand-in.
+        self._transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "HttpClients":
+        return cls(
+            max_connections=settings.http_max_connections,
+            max_keepalive=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry,
+            http2=settings.http2,
+        )
+
+    def get(self, upstream: str) -> httpx.AsyncClient:
+        client = self._clients.get(upstream)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self._limits,
+                http2=self._http2,
+                timeout=self._timeout,
+                headers={"User-Agent": USER_AGENT},
+                transport=self._transport,
+            )
+            self._clients[upstream] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+@asynccontextmanager
+async def borrow(client: httpx.AsyncClient | None) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Yield the injected client as-is, or a short-lived one when none was given.
+    """
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as temp:
+        yield temp
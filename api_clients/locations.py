@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from api_clients.cache import AsyncTTLCache
+from api_clients.weatherapi import WeatherAPIError, search_locations
+
+DB_PATH = Path("data/locations.db")
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Location:
+    id: int
+    name: str
+    region: str
+    country: str
+    lat: float
+    lon: float
+
+    @property
+    def query(self) -> str:
+        """
+        WeatherAPI ``q`` value that pins this exact location.
+        """
+        return f"id:{self.id}"
+
+    @property
+    def label(self) -> str:
+        return ", ".join(part for part in (self.name, self.region, self.country) if part)
+
+
+def normalize_alias(text: str) -> str:
+    return re.sub(r"[\s,]+", " ", text).strip(" .;").casefold()
+
+
+class LocationResolver:
+    """
+    Maps free-text locations to canonical WeatherAPI locations.
+
+    Lookups go through a bounded in-memory LRU, then an SQLite alias table
+    that survives restarts, and only then the WeatherAPI search endpoint.
+    Concurrent lookups of the same alias share one search. If the table
+    cannot be opened or written (e.g. a read-only ``data/``), resolved
+    locations are only kept in memory.
+    """
+
+    def __init__(self, path: Path = DB_PATH, max_entries: int = 4096) -> None:
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        try:
+            self._conn = self._open(path)
+        except (OSError, sqlite3.Error) as exc:
+            log.warning("Location aliases will not persist, cannot open %s: %s", path, exc)
+        self._memo = AsyncTTLCache(max_entries=max_entries)
+
+    @staticmethod
+    def _open(path: Path) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS location ("
+                "id INTEGER PRIMARY KEY, name TEXT, region TEXT, country TEXT, lat REAL, lon REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS location_alias ("
+                "alias TEXT PRIMARY KEY, location_id INTEGER NOT NULL REFERENCES location(id))"
+            )
+        return conn
+
+    async def resolve(self, text: str, *, client: httpx.AsyncClient | None = None) -> Location:
+        alias = normalize_alias(text)
+        if not alias:
+            raise WeatherAPIError("Please provide a location.")
+        return await self._memo.get_or_fetch(alias, lambda: self._lookup(alias, text, client), ttl=None)
+
+    async def _lookup(self, alias: str, text: str, client: httpx.AsyncClient | None) -> Location:
+        stored = await asyncio.to_thread(self._load, alias)
+        if stored is not None:
+            return stored
+        results = await search_locations(text.strip(), client=client)
+        if not results:
+            raise WeatherAPIError(f"No location found for '{text.strip()}'.")
+        best = results[0]
+        location = Location(
+            id=int(best["id"]),
+            name=best.get("name", ""),
+            region=best.get("region", ""),
+            country=best.get("country", ""),
+            lat=float(best.get("lat", 0.0)),
+            lon=float(best.get("lon", 0.0)),
+        )
+        await asyncio.to_thread(self._store, alias, location)
+        return location
+
+    def _load(self, alias: str) -> Location | None:
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT l.id, l.name, l.region, l.country, l.lat, l.lon FROM location_alias a "
+                    "JOIN location l ON l.id = a.location_id WHERE a.alias = ?",
+                    (alias,),
+                ).fetchone()
+        except sqlite3.Error as exc:
+            log.warning("Location alias read failed: %s", exc)
+            return None
+        return Location(*row) if row else None
+
+    def _store(self, alias: str, location: Location) -> None:
+        if self._conn is None:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO location (id, name, region, country, lat, lon) VALUES (?, ?, ?, ?, ?, ?)",
+                    (location.id, location.name, location.region, location.country, location.lat, location.lon),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO location_alias (alias, location_id) VALUES (?, ?)",
+                    (alias, location.id),
+                )
+        except sqlite3.Error as exc:
+            log.warning("Location alias write failed: %s", exc)
+
+
+_resolver: LocationResolver | None = None
+
+
+def get_resolver() -> LocationResolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = LocationResolver()
+    return _resolver
+
+
+async def resolve_location(text: str, *, client: httpx.AsyncClient | None = None) -> Location:
+    return await get_resolver().resolve(text, client=client)
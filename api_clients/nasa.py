@@ -1,26 +1,72 @@
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
 
 import httpx
 
+from api_clients.donki_store import get_store
+from api_clients.http import borrow
+from api_clients.resilience import upstream
+
 DONKI_NOTIFICATIONS = "https://api.nasa.gov/DONKI/notifications"
+# Notification types DONKI can be asked for, and that /space aurora can filter on.
+MESSAGE_TYPES = ("FLR", "SEP", "CME", "IPS", "MPC", "GST", "RBE", "Report")
+BACKFILL_DAYS = 30
+RETENTION_DAYS = 90
+
 
+async def sync_notifications(api_key: str, *, client: httpx.AsyncClient | None = None) -> int:
+    """
+    Fetch notifications issued since the newest one in the local store and
+    add them; returns how many were new.
 
-async def fetch_space_weather(api_key: str, limit: int = 3) -> List[Dict[str, Any]]:
+    DONKI filters by whole days, so the day of the last stored message is
+    requested again and its messages are deduplicated by ``messageID``. An
+    empty store is backfilled with the last ``BACKFILL_DAYS`` days.
     """
-    Fetch recent space weather notifications (solar flares, aurora watches, etc.).
+    store = get_store()
+    today = dt.datetime.now(dt.timezone.utc).date()
+    last = await asyncio.to_thread(store.last_issued)
+    start = last.date() if last is not None else today - dt.timedelta(days=BACKFILL_DAYS)
+    items = await _fetch_notifications(api_key, start, today, client)
+    added = await asyncio.to_thread(store.upsert, items)
+    await asyncio.to_thread(store.prune, dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=RETENTION_DAYS))
+    return added
+
+
+async def fetch_space_weather(
+    api_key: str,
+    limit: int = 3,
+    *,
+    client: httpx.AsyncClient | None = None,
+    types: Sequence[str] | None = None,
+    since: dt.datetime | None = None,
+    until: dt.datetime | None = None,
+) -> List[Dict[str, Any]]:
     """
-    params = {"type": "all", "api_key": api_key}
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(DONKI_NOTIFICATIONS, params=params)
+    The newest space weather notifications (solar flares, aurora watches, etc.)
+    from the local store, optionally of the given ``messageType`` values and
+    issued within ``[since, until]``.
+
+    The store is kept current by ``sync_notifications``; NASA is only called
+    here while the store is still empty.
+    """
+    store = get_store()
+    if not await asyncio.to_thread(len, store):
+        await sync_notifications(api_key, client=client)
+    return await asyncio.to_thread(store.newest, limit, types=types, since=since, until=until)
+
+
+async def _fetch_notifications(
+    api_key: str, start: dt.date, end: dt.date, client: httpx.AsyncClient | None
+) -> List[Dict[str, Any]]:
+    params = {"type": "all", "startDate": start.isoformat(), "endDate": end.isoformat(), "api_key": api_key}
+    async with borrow(client) as http:
+        resp = await upstream("nasa").get(http, DONKI_NOTIFICATIONS, params=params)
         resp.raise_for_status()
-        data = resp.json()
-    sorted_items = sorted(
-        data, key=lambda item: item.get("messageIssueTime", ""), reverse=True
-    )
-    return sorted_items[:limit]
+        return resp.json()
 
 
 def format_notification(item: Dict[str, Any]) -> str:
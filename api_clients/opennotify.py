@@ -4,12 +4,15 @@ from typing import Any, Dict
 
 import httpx
 
+from api_clients.http import borrow
+from api_clients.resilience import upstream
+
 ISS_NOW_URL = "http://api.open-notify.org/iss-now.json"
 
 
-async def fetch_iss_position() -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(ISS_NOW_URL)
+async def fetch_iss_position(*, client: httpx.AsyncClient | None = None) -> Dict[str, Any]:
+    async with borrow(client) as http:
+        resp = await upstream("opennotify").get(http, ISS_NOW_URL)
         resp.raise_for_status()
         payload = resp.json()
     position = payload.get("iss_position", {})
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Hashable, List, Tuple
+
+DB_PATH = Path("data/response_cache.db")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+EVICT_EVERY = 64
+
+log = logging.getLogger(__name__)
+
+
+def encode_key(key: Hashable) -> str:
+    return json.dumps(list(key) if isinstance(key, tuple) else key, separators=(",", ":"))
+
+
+def decode_key(raw: str) -> Hashable:
+    value = json.loads(raw)
+    return tuple(value) if isinstance(value, list) else value
+
+
+class PersistentCache:
+    """
+    SQLite-backed response store that survives restarts and deploys.
+
+    Payloads are JSON compressed with zlib. Entries carry an absolute
+    expiry (NULL = immutable), and the store is kept under ``max_bytes``
+    by evicting the least recently used rows. The connection opens lazily
+    on first use.
+    """
+
+    def __init__(self, path: Path = DB_PATH, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS response_cache ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, payload BLOB NOT NULL, size INTEGER NOT NULL, "
+                    "expires_at REAL, accessed_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace: str, key: Hashable) -> Tuple[Any, float | None] | None:
+        """
+        ``(value, remaining_ttl)`` for a live entry, else None.
+        """
+        now = time.time()
+        encoded = encode_key(key)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, expires_at FROM response_cache WHERE namespace = ? AND key = ?",
+                (namespace, encoded),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                with conn:
+                    conn.execute("DELETE FROM response_cache WHERE namespace = ? AND key = ?", (namespace, encoded))
+                return None
+            with conn:
+                conn.execute(
+                    "UPDATE response_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, encoded),
+                )
+        return _decode(row[0]), (None if row[1] is None else row[1] - now)
+
+    def put(self, namespace: str, key: Hashable, value: Any, ttl: float | None) -> None:
+        now = time.time()
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (namespace, key, payload, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (namespace, encode_key(key), payload, len(payload), None if ttl is None else now + ttl, now),
+                )
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict(conn)
+
+    def recent(self, namespace: str, limit: int) -> List[Tuple[Hashable, Any, float | None]]:
+        """
+        Most recently used live entries as ``(key, value, remaining_ttl)``, for warming memory.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, payload, expires_at FROM response_cache "
+                "WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?) "
+                "ORDER BY accessed_at DESC LIMIT ?",
+                (namespace, now, limit),
+            ).fetchall()
+        return [
+            (decode_key(key), _decode(payload), None if expires is None else expires - now)
+            for key, payload, expires in rows
+        ]
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if namespace is None:
+                    conn.execute("DELETE FROM response_cache")
+                else:
+                    conn.execute("DELETE FROM response_cache WHERE namespace = ?", (namespace,))
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict(self._connect())
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute("DELETE FROM response_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            freed = 0
+            doomed = []
+            for namespace, key, size in conn.execute(
+                "SELECT namespace, key, size FROM response_cache ORDER BY accessed_at ASC"
+            ):
+                doomed.append((namespace, key))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM response_cache WHERE namespace = ? AND key = ?", doomed)
+        log.info("Evicted %d cached responses (%d bytes)", len(doomed), freed)
+
+
+def _decode(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload))
+
+
+_cache: PersistentCache | None = None
+
+
+def get_persistent_cache() -> PersistentCache:
+    global _cache
+    if _cache is None:
+        _cache = PersistentCache()
+    return _cache
+
+
+def configure(*, path: Path = DB_PATH, max_bytes: int = DEFAULT_MAX_BYTES) -> PersistentCache:
+    global _cache
+    _cache = PersistentCache(path, max_bytes=max_bytes)
+    return _cache
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+USGS_EVENT_URL = "https://earthquake.usgs.gov/earthquakes/eventpage/{}"
+
+# Sortable numeric columns.
+COLUMNS = ("lat", "lon", "depth", "magnitude", "time", "updated")
+
+Quake = Dict[str, Any]
+
+
+def _number(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) else float("nan")
+
+
+def _optional(value: Any) -> float | None:
+    value = float(value)
+    return None if value != value else value
+
+
+def _decimal(value: Any) -> float | None:
+    # float32 columns keep ~7 significant digits; USGS reports at most 3 decimals.
+    value = _optional(value)
+    return None if value is None else round(value, 3)
+
+
+class QuakeBatch:
+    """
+    A set of earthquake events stored column by column.
+
+    Coordinates are float64, depth and magnitude float32, origin and update
+    times int64 epoch milliseconds (0 when unknown); missing numbers are NaN.
+    Event ids are fixed-width bytes and places are interned once per batch
+    and referenced by index, so a month-long window takes tens of bytes per
+    event instead of a dict of Python objects. Slicing returns views;
+    ``filter``, ``sort`` and ``top_k`` work on whole columns at once.
+    """
+
+    __slots__ = ("ids", "lat", "lon", "depth", "magnitude", "time", "updated", "place_index", "places")
+
+    def __init__(
+        self,
+        *,
+        ids: np.ndarray,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        depth: np.ndarray,
+        magnitude: np.ndarray,
+        time: np.ndarray,
+        updated: np.ndarray,
+        place_index: np.ndarray,
+        places: List[str],
+    ) -> None:
+        self.ids = ids
+        self.lat = lat
+        self.lon = lon
+        self.depth = depth
+        self.magnitude = magnitude
+        self.time = time
+        self.updated = updated
+        self.place_index = place_index
+        self.places = places
+
+    @classmethod
+    def empty(cls) -> "QuakeBatch":
+        return QuakeBatchBuilder().build()
+
+    @classmethod
+    def from_records(cls, quakes: Iterable[Quake]) -> "QuakeBatch":
+        builder = QuakeBatchBuilder()
+        for quake in quakes:
+            builder.append(quake)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getitem__(self, key: Any) -> "QuakeBatch":
+        """
+        Rows selected by a slice (views, no copy), an index array or a boolean mask.
+        """
+        if isinstance(key, (int, np.integer)):
+            raise TypeError("Use record(i) for a single event.")
+        return QuakeBatch(
+            ids=self.ids[key],
+            lat=self.lat[key],
+            lon=self.lon[key],
+            depth=self.depth[key],
+            magnitude=self.magnitude[key],
+            time=self.time[key],
+            updated=self.updated[key],
+            place_index=self.place_index[key],
+            places=self.places,
+        )
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        # Slices share their parent's place table; only ship the places they use.
+        place_index, places = self.place_index, self.places
+        if len(places) > len(self):
+            used, place_index = np.unique(place_index, return_inverse=True)
+            place_index = place_index.astype(np.int32)
+            places = [places[i] for i in used]
+        return (self.ids, self.lat, self.lon, self.depth, self.magnitude, self.time, self.updated, place_index, places)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the batch, including the interned places.
+        """
+        columns = sum(getattr(self, name).nbytes for name in ("ids", *COLUMNS, "place_index"))
+        return columns + sum(sys.getsizeof(place) for place in self.places)
+
+    def mask(
+        self,
+        *,
+        min_magnitude: float | None = None,
+        bbox: Tuple[float, float, float, float] | None = None,
+        since_ms: int | None = None,
+    ) -> np.ndarray:
+        """
+        Boolean mask of events matching every given condition.
+
+        ``bbox`` is ``(min_lon, min_lat, max_lon, max_lat)`` and wraps across
+        the antimeridian when ``min_lon`` is greater than ``max_lon``.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if min_magnitude is not None:
+            keep &= self.magnitude >= min_magnitude
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            keep &= (self.lat >= min_lat) & (self.lat <= max_lat)
+            if min_lon <= max_lon:
+                keep &= (self.lon >= min_lon) & (self.lon <= max_lon)
+            else:
+                keep &= (self.lon >= min_lon) | (self.lon <= max_lon)
+        if since_ms is not None:
+            keep &= self.time >= since_ms
+        return keep
+
+    def filter(self, **conditions: Any) -> "QuakeBatch":
+        """
+        Events matching ``mask(**conditions)``; NaN magnitudes and coordinates never match.
+        """
+        return self[self.mask(**conditions)]
+
+    def _order_key(self, by: str) -> np.ndarray:
+        if by not in COLUMNS:
+            raise ValueError(f"Cannot order quakes by {by!r}; expected one of {', '.join(COLUMNS)}.")
+        return getattr(self, by)
+
+    def sort(self, by: str = "time", *, descending: bool = True) -> "QuakeBatch":
+        """
+        A stable sort on one column; NaNs go last in either direction.
+        """
+        key = self._order_key(by)
+        if descending:
+            # Negating keeps the sort stable for ties, unlike reversing an ascending order.
+            key = -key.astype(np.float64) if key.dtype.kind == "f" else -key
+        return self[np.argsort(key, kind="stable")]
+
+    def top_k(self, k: int, by: str = "magnitude") -> "QuakeBatch":
+        """
+        The ``k`` largest events by one column, largest first, in O(n) plus O(k log k).
+        """
+        if k >= len(self):
+            return self.sort(by)
+        if k <= 0:
+            return self[:0]
+        key = self._order_key(by)
+        if key.dtype.kind == "f":
+            key = np.nan_to_num(key.astype(np.float64), nan=-np.inf)
+        picked = np.argpartition(-key, k - 1)[:k]
+        return self[picked[np.argsort(-key[picked], kind="stable")]]
+
+    def record(self, i: int) -> Quake:
+        """
+        Event ``i`` as the dict shape ``usgs`` has always returned.
+        """
+        event_id = self.ids[i].decode("ascii") or None
+        time, updated = int(self.time[i]), int(self.updated[i])
+        return {
+            "id": event_id,
+            "updated": updated or None,
+            "place": self.places[self.place_index[i]],
+            "magnitude": _decimal(self.magnitude[i]),
+            "time": time or None,
+            "url": USGS_EVENT_URL.format(event_id) if event_id else None,
+            "lon": _optional(self.lon[i]),
+            "lat": _optional(self.lat[i]),
+            "depth": _decimal(self.depth[i]),
+        }
+
+    def records(self) -> Iterator[Quake]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+
+class QuakeBatchBuilder:
+    """
+    Appends parsed quakes into growable ``array`` columns and hands them to
+    NumPy without copying when built.
+    """
+
+    def __init__(self) -> None:
+        self._ids: List[bytes] = []
+        self._lat = array("d")
+        self._lon = array("d")
+        self._depth = array("f")
+        self._magnitude = array("f")
+        self._time = array("q")
+        self._updated = array("q")
+        self._place_index = array("i")
+        self._place_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._lat)
+
+    def append(self, quake: Quake) -> None:
+        self._ids.append((quake.get("id") or "").encode("ascii", "replace"))
+        self._lat.append(_number(quake.get("lat")))
+        self._lon.append(_number(quake.get("lon")))
+        self._depth.append(_number(quake.get("depth")))
+        self._magnitude.append(_number(quake.get("magnitude")))
+        self._time.append(int(quake.get("time") or 0))
+        self._updated.append(int(quake.get("updated") or 0))
+        place = quake.get("place") or "Unknown"
+        code = self._place_codes.get(place)
+        if code is None:
+            code = self._place_codes[place] = len(self._place_codes)
+        self._place_index.append(code)
+
+    def build(self) -> QuakeBatch:
+        width = max((len(event_id) for event_id in self._ids), default=1) or 1
+        return QuakeBatch(
+            ids=np.array(self._ids, dtype=f"S{width}"),
+            lat=np.frombuffer(self._lat, dtype=np.float64),
+            lon=np.frombuffer(self._lon, dtype=np.float64),
+            depth=np.frombuffer(self._depth, dtype=np.float32),
+            magnitude=np.frombuffer(self._magnitude, dtype=np.float32),
+            time=np.frombuffer(self._time, dtype=np.int64),
+            updated=np.frombuffer(self._updated, dtype=np.int64),
+            place_index=np.frombuffer(self._place_index, dtype=np.int32),
+            places=list(self._place_codes),
+        )
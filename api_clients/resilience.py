@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict
+
+import httpx
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+REQUEST_SECONDS = metrics.histogram(
+    "geolive_upstream_request_seconds", "Upstream HTTP request latency.", ["upstream", "outcome"]
+)
+RETRIES = metrics.counter("geolive_upstream_retries_total", "Upstream requests retried.", ["upstream"])
+HEDGES = metrics.counter("geolive_upstream_hedges_total", "Hedged upstream requests fired.", ["upstream"])
+REJECTED = metrics.counter(
+    "geolive_upstream_rejected_total", "Calls failed fast by an open circuit.", ["upstream"]
+)
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Policy:
+    min_timeout: float = 1.5
+    max_timeout: float = 10.0
+    # Adaptive timeout = p99 latency x multiplier, clamped to [min, max].
+    timeout_multiplier: float = 3.0
+    min_samples: int = 20
+    window: int = 200
+    retries: int = 2
+    backoff: float = 0.25
+    # Fire a second request once the first is slower than this percentile.
+    hedge: bool = False
+    hedge_percentile: float = 95.0
+    failure_threshold: int = 5
+    reset_after: float = 30.0
+
+
+class CircuitBreaker:
+    """
+    closed -> open after ``failure_threshold`` consecutive failures; after
+    ``reset_after`` seconds one probe is let through (half-open) and its
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_after: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+            self.state = "half_open"
+            return True
+        return self.state == "closed"
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            log.info("Circuit for %s closed", self.name)
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                log.warning("Circuit for %s opened after %d failures", self.name, self.failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def abandon_probe(self) -> None:
+        """
+        Re-open if the half-open probe ended without an outcome (cancelled, or an
+        unexpected error), so the next probe is admitted after ``reset_after``.
+        """
+        if self.state == "half_open":
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class _Retryable(Exception):
+    def __init__(self, response: httpx.Response) -> None:
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class Upstream:
+    """
+    Per-upstream call policy: adaptive timeouts from observed latency,
+    jittered retries for idempotent requests, optional hedging and a
+    circuit breaker that fails fast while the upstream is unhealthy.
+    """
+
+    def __init__(self, name: str, policy: Policy | None = None) -> None:
+        self.name = name
+        self.policy = policy or Policy()
+        self.breaker = CircuitBreaker(name, self.policy.failure_threshold, self.policy.reset_after)
+        self._latencies: Deque[float] = deque(maxlen=self.policy.window)
+
+    def percentile(self, pct: float) -> float | None:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def timeout(self) -> float:
+        policy = self.policy
+        if len(self._latencies) < policy.min_samples:
+            return policy.max_timeout
+        p99 = self.percentile(99) or policy.max_timeout
+        return min(policy.max_timeout, max(policy.min_timeout, p99 * policy.timeout_multiplier))
+
+    async def get(self, client: httpx.AsyncClient, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request(client, "GET", url, **kwargs)
+
+    def _admit(self) -> bool:
+        """
+        Fail fast while the circuit is open; returns whether this call is the half-open probe.
+        """
+        if not self.breaker.allow():
+            REJECTED.inc(upstream=self.name)
+            raise UpstreamUnavailable(f"{self.name} is temporarily unavailable (circuit open).")
+        return self.breaker.state == "half_open"
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        probe = self._admit()
+        try:
+            return await self._request(client, method, url, **kwargs)
+        finally:
+            if probe:
+                self.breaker.abandon_probe()
+
+    async def _request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        idempotent = method in ("GET", "HEAD")
+        attempts = self.policy.retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                response = await self._attempt(client, method, url, hedge=idempotent and self.policy.hedge, **kwargs)
+                if response.status_code in RETRYABLE_STATUS:
+                    raise _Retryable(response)
+            except (httpx.TransportError, _Retryable) as exc:
+                last_try = attempt == attempts - 1 or self.breaker.state == "open"
+                if last_try:
+                    # One breaker failure per logical request, however many attempts it took.
+                    self.breaker.record_failure()
+                    if isinstance(exc, _Retryable):
+                        return exc.response
+                    raise
+                RETRIES.inc(upstream=self.name)
+                await asyncio.sleep(self.policy.backoff * (2**attempt) * random.uniform(0.5, 1.5))
+                continue
+            self.breaker.record_success()
+            return response
+        raise AssertionError("unreachable")
+
+    @asynccontextmanager
+    async def stream(self, client: httpx.AsyncClient, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """
+        Streamed GET under the same timeout and circuit breaker, without retries.
+
+        Latency is measured to the response headers; the body is read by the caller.
+        """
+        probe = self._admit()
+        timeout = self.timeout()
+        started = time.monotonic()
+        try:
+            async with client.stream("GET", url, timeout=timeout, **kwargs) as response:
+                elapsed = time.monotonic() - started
+                self._latencies.append(elapsed)
+                REQUEST_SECONDS.observe(elapsed, upstream=self.name, outcome=str(response.status_code))
+                if response.status_code in RETRYABLE_STATUS:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                yield response
+        except httpx.TransportError as exc:
+            REQUEST_SECONDS.observe(time.monotonic() - started, upstream=self.name, outcome=type(exc).__name__)
+            self._record_timeout(exc, timeout)
+            self.breaker.record_failure()
+            raise
+        finally:
+            if probe:
+                self.breaker.abandon_probe()
+
+    async def _attempt(
+        self, client: httpx.AsyncClient, method: str, url: str, *, hedge: bool, **kwargs: Any
+    ) -> httpx.Response:
+        timeout = self.timeout()
+        hedge_delay = self.percentile(self.policy.hedge_percentile) if hedge else None
+        if hedge_delay is None or len(self._latencies) < self.policy.min_samples:
+            return await self._timed(client, method, url, timeout, **kwargs)
+
+        primary = asyncio.ensure_future(self._timed(client, method, url, timeout, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return primary.result()
+        HEDGES.inc(upstream=self.name)
+        secondary = asyncio.ensure_future(self._timed(client, method, url, timeout, **kwargs))
+        pending = {primary, secondary}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _timed(
+        self, client: httpx.AsyncClient, method: str, url: str, timeout: float, **kwargs: Any
+    ) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await client.request(method, url, timeout=timeout, **kwargs)
+        except httpx.TransportError as exc:
+            REQUEST_SECONDS.observe(time.monotonic() - started, upstream=self.name, outcome=type(exc).__name__)
+            self._record_timeout(exc, timeout)
+            raise
+        elapsed = time.monotonic() - started
+        self._latencies.append(elapsed)
+        REQUEST_SECONDS.observe(elapsed, upstream=self.name, outcome=str(response.status_code))
+        return response
+
+    def _record_timeout(self, exc: Exception, timeout: float) -> None:
+        # A timed-out attempt took at least the timeout. Counting it as a sample lets
+        # p99 (and so the timeout) grow again when a healthy upstream slows down.
+        if isinstance(exc, httpx.TimeoutException):
+            self._latencies.append(timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "timeout": round(self.timeout(), 3),
+            "samples": len(self._latencies),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+POLICIES: Dict[str, Policy] = {
+    "usgs": Policy(),
+    "weatherapi": Policy(),
+    "nasa": Policy(max_timeout=15.0),
+    "opennotify": Policy(min_timeout=1.0, max_timeout=5.0, hedge=True),
+}
+
+_upstreams: Dict[str, Upstream] = {}
+
+
+def upstream(name: str) -> Upstream:
+    found = _upstreams.get(name)
+    if found is None:
+        found = _upstreams[name] = Upstream(name, POLICIES.get(name))
+    return found
+
+
+def snapshot_all() -> Dict[str, Dict[str, Any]]:
+    return {name: up.snapshot() for name, up in _upstreams.items()}
+
+
+_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+metrics.gauge(
+    "geolive_upstream_circuit_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open).",
+    ["upstream"],
+    callback=lambda: {(name,): _STATE_VALUES[up.breaker.state] for name, up in _upstreams.items()},
+)
+metrics.gauge(
+    "geolive_upstream_timeout_seconds",
+    "Current adaptive timeout per upstream.",
+    ["upstream"],
+    callback=lambda: {(name,): up.timeout() for name, up in _upstreams.items()},
+)
@@ -1,32 +1,194 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
 
 import httpx
 
-USGS_FEED = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_hour.geojson"
-
-
-async def fetch_recent_earthquakes() -> List[Dict[str, Any]]:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(USGS_FEED)
-        resp.raise_for_status()
-        payload = resp.json()
-    features = payload.get("features", [])
-    quakes: List[Dict[str, Any]] = []
-    for item in features:
-        props = item.get("properties", {})
-        geometry = item.get("geometry", {})
-        coords = geometry.get("coordinates", [None, None, None])
-        quakes.append(
-            {
-                "place": props.get("place", "Unknown"),
-                "magnitude": props.get("mag", "N/A"),
-                "time": props.get("time"),
-                "url": props.get("url"),
-                "lon": coords[0],
-                "lat": coords[1],
-                "depth": coords[2],
-            }
-        )
-    return quakes
+from api_clients.geojson import FeatureFilter, stream_records
+from api_clients.http import borrow
+from api_clients.quake_batch import QuakeBatch, QuakeBatchBuilder
+from api_clients.resilience import upstream
+
+USGS_FEED_BASE = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary"
+USGS_FEED = f"{USGS_FEED_BASE}/all_hour.geojson"
+USGS_DAY_FEED = f"{USGS_FEED_BASE}/all_day.geojson"
+USGS_WEEK_FEED = f"{USGS_FEED_BASE}/all_week.geojson"
+USGS_MONTH_FEED = f"{USGS_FEED_BASE}/all_month.geojson"
+SEEN_STATE_PATH = Path("data/usgs_seen.json")
+
+log = logging.getLogger(__name__)
+
+
+def _parse_feature(item: Dict[str, Any]) -> Dict[str, Any]:
+    props = item.get("properties", {})
+    geometry = item.get("geometry", {})
+    coords = geometry.get("coordinates", [None, None, None])
+    return {
+        "id": item.get("id"),
+        "updated": props.get("updated"),
+        "place": props.get("place", "Unknown"),
+        "magnitude": props.get("mag", "N/A"),
+        "time": props.get("time"),
+        "url": props.get("url"),
+        "lon": coords[0],
+        "lat": coords[1],
+        "depth": coords[2],
+    }
+
+
+def parse_features(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [_parse_feature(item) for item in payload.get("features", [])]
+
+
+async def _read_quakes(resp: httpx.Response, where: FeatureFilter | None) -> List[Dict[str, Any]]:
+    # Parsed feature by feature as the body arrives; large feeds are never held whole.
+    return [quake async for quake in stream_records(resp, _parse_feature, where)]
+
+
+async def _read_batch(resp: httpx.Response, where: FeatureFilter | None) -> QuakeBatch:
+    builder = QuakeBatchBuilder()
+    async for quake in stream_records(resp, _parse_feature, where):
+        builder.append(quake)
+    return builder.build()
+
+
+async def fetch_recent_earthquakes(
+    *,
+    client: httpx.AsyncClient | None = None,
+    url: str = USGS_FEED,
+    min_magnitude: float | None = None,
+    bbox: Tuple[float, float, float, float] | None = None,
+) -> QuakeBatch:
+    """
+    Events from a USGS summary feed as a columnar batch, optionally only those
+    at or above ``min_magnitude`` and inside ``bbox`` (min_lon, min_lat,
+    max_lon, max_lat).
+    """
+    where = FeatureFilter(min_magnitude=min_magnitude, bbox=bbox)
+    async with borrow(client) as http:
+        async with upstream("usgs").stream(http, url) as resp:
+            resp.raise_for_status()
+            return await _read_batch(resp, where)
+
+
+class QuakeFeed:
+    """
+    Incremental reader for a USGS GeoJSON summary feed.
+
+    Uses conditional GETs so unchanged feeds are never re-parsed, streams
+    the body so large windows are never held whole, and keeps a
+    bounded, persisted record of seen event ids so ``poll`` only returns
+    events that are new (``change="new"``) or whose magnitude was revised
+    (``change="updated"`` with ``previous_magnitude``).
+    """
+
+    def __init__(
+        self,
+        url: str = USGS_FEED,
+        *,
+        state_path: Path | None = SEEN_STATE_PATH,
+        max_seen: int = 5000,
+        where: FeatureFilter | None = None,
+    ) -> None:
+        self.url = url
+        self.where = where
+        self.state_path = state_path
+        self.max_seen = max_seen
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        # event id -> [updated, magnitude], oldest first
+        self._seen: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._load_state()
+
+    @property
+    def validators(self) -> Dict[str, str | None]:
+        """
+        ETag and Last-Modified of the last body read, sent on the next request.
+        """
+        return {"etag": self._etag, "last_modified": self._last_modified}
+
+    @validators.setter
+    def validators(self, value: Dict[str, str | None]) -> None:
+        self._etag = value.get("etag")
+        self._last_modified = value.get("last_modified")
+
+    async def fetch(self, *, client: httpx.AsyncClient | None = None) -> List[Dict[str, Any]] | None:
+        """
+        Every event in the feed, or None if it has not changed since the last read.
+
+        Unlike ``poll`` this does not consult or update the seen-set.
+        """
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        async with borrow(client) as http:
+            async with upstream("usgs").stream(http, self.url, headers=headers) as resp:
+                if resp.status_code == 304:
+                    return None
+                resp.raise_for_status()
+                quakes = await _read_quakes(resp, self.where)
+
+        self._etag = resp.headers.get("ETag")
+        self._last_modified = resp.headers.get("Last-Modified")
+        return quakes
+
+    async def poll(self, *, client: httpx.AsyncClient | None = None) -> List[Dict[str, Any]]:
+        quakes = await self.fetch(client=client)
+        if quakes is None:
+            return []
+        deltas = self._diff(quakes)
+        self._save_state()
+        return deltas
+
+    def _diff(self, quakes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        deltas: List[Dict[str, Any]] = []
+        for quake in quakes:
+            event_id = quake.get("id")
+            if not event_id:
+                continue
+            previous = self._seen.get(event_id)
+            if previous is None:
+                deltas.append({**quake, "change": "new"})
+            elif (quake.get("updated") or 0) > (previous[0] or 0) and quake.get("magnitude") != previous[1]:
+                deltas.append({**quake, "change": "updated", "previous_magnitude": previous[1]})
+            self._seen[event_id] = [quake.get("updated"), quake.get("magnitude")]
+            self._seen.move_to_end(event_id)
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+        return deltas
+
+    def _load_state(self) -> None:
+        if self.state_path is None or not self.state_path.exists():
+            return
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except Exception as exc:
+            log.warning("Ignoring unreadable USGS state %s: %s", self.state_path, exc)
+            return
+        self._etag = state.get("etag")
+        self._last_modified = state.get("last_modified")
+        self._seen = OrderedDict(state.get("seen", []))
+
+    def _save_state(self) -> None:
+        if self.state_path is None:
+            return
+        state = {
+            "etag": self._etag,
+            "last_modified": self._last_modified,
+            "seen": list(self._seen.items()),
+        }
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        except OSError as exc:
+            log.warning("Could not persist USGS state %s: %s", self.state_path, exc)
@@ -1,19 +1,48 @@
 from __future__ import annotations
 
+import asyncio
+import datetime as dt
+import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
 
 import httpx
 
+from api_clients.cache import AsyncTTLCache
+from api_clients.http import borrow
+from api_clients.resilience import UpstreamUnavailable, upstream
+
 CURRENT_URL = "https://api.weatherapi.com/v1/current.json"
 HISTORY_URL = "https://api.weatherapi.com/v1/history.json"
 FORECAST_URL = "https://api.weatherapi.com/v1/forecast.json"
+SEARCH_URL = "https://api.weatherapi.com/v1/search.json"
+
+# Bulk requests (q=bulk) are limited to 50 locations and paid plans.
+BULK_MAX_LOCATIONS = 50
+
+# (ttl, stale_ttl) in seconds per endpoint; settled history days never expire.
+CURRENT_TTL = (300.0, 600.0)
+FORECAST_TTL = (1800.0, 3600.0)
+HISTORY_TODAY_TTL = (600.0, 1200.0)
+
+log = logging.getLogger(__name__)
+
+_cache = AsyncTTLCache(max_entries=2048, persist="weatherapi")
+_bulk_supported = True
 
 
 class WeatherAPIError(Exception):
     pass
 
 
+class _BulkUnavailable(WeatherAPIError):
+    pass
+
+
+class _BulkRejected(WeatherAPIError):
+    pass
+
+
 def _get_api_key() -> str:
     key = os.getenv("WEATHER_API_KEY")
     if not key:
@@ -21,18 +50,63 @@ def _get_api_key() -> str:
     return key
 
 
-async def _get_json(url: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(url, params=params)
+async def warm_cache() -> int:
+    return await _cache.warm()
+
+
+def _normalize_location(location: str) -> str:
+    return " ".join(location.split()).casefold()
+
+
+def _is_settled_day(date: str) -> bool:
+    """
+    True once ``date`` is over in every timezone, so its history cannot change.
+    """
+    try:
+        day = dt.date.fromisoformat(date)
+    except ValueError:
+        return False
+    return day < dt.datetime.now(dt.timezone.utc).date() - dt.timedelta(days=1)
+
+
+async def _get_json(
+    url: str, params: Dict[str, Any], client: httpx.AsyncClient | None = None
+) -> Dict[str, Any]:
+    async with borrow(client) as http:
+        resp = await upstream("weatherapi").get(http, url, params=params)
         if resp.status_code != 200:
             raise WeatherAPIError(f"WeatherAPI request failed: {resp.text}")
         return resp.json()
 
 
-async def get_current_weather(location: str) -> Dict[str, Any]:
+async def search_locations(query: str, *, client: httpx.AsyncClient | None = None) -> List[Dict[str, Any]]:
+    """
+    Matching locations (id, name, region, country, lat, lon) for free text.
+    """
+    key = _get_api_key()
+    return await _get_json(SEARCH_URL, {"key": key, "q": query}, client)  # type: ignore[return-value]
+
+
+async def get_current_weather(
+    location: str, *, client: httpx.AsyncClient | None = None
+) -> Dict[str, Any]:
+    ttl, stale_ttl = CURRENT_TTL
+    return await _cache.get_or_fetch(
+        ("current", _normalize_location(location)),
+        lambda: _fetch_current_weather(location, client),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+    )
+
+
+async def _fetch_current_weather(location: str, client: httpx.AsyncClient | None) -> Dict[str, Any]:
     key = _get_api_key()
     params = {"key": key, "q": location, "aqi": "yes"}
-    data = await _get_json(CURRENT_URL, params)
+    data = await _get_json(CURRENT_URL, params, client)
+    return _parse_current(data)
+
+
+def _parse_current(data: Dict[str, Any]) -> Dict[str, Any]:
     current = data.get("current", {})
     location_info = data.get("location", {})
     return {
@@ -46,15 +120,31 @@ async def get_current_weather(location: str) -> Dict[str, Any]:
         "country": location_info.get("country"),
         "region": location_info.get("region"),
         "city": location_info.get("name"),
+        "lat": location_info.get("lat"),
+        "lon": location_info.get("lon"),
         "aqi_pm2_5": current.get("air_quality", {}).get("pm2_5"),
         "aqi_pm10": current.get("air_quality", {}).get("pm10"),
     }
 
 
-async def get_weather_history(location: str, date: str) -> Dict[str, List[Any]]:
+async def get_weather_history(
+    location: str, date: str, *, client: httpx.AsyncClient | None = None
+) -> Dict[str, List[Any]]:
+    ttl, stale_ttl = (None, 0.0) if _is_settled_day(date) else HISTORY_TODAY_TTL
+    return await _cache.get_or_fetch(
+        ("history", _normalize_location(location), date),
+        lambda: _fetch_weather_history(location, date, client),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+    )
+
+
+async def _fetch_weather_history(
+    location: str, date: str, client: httpx.AsyncClient | None
+) -> Dict[str, List[Any]]:
     key = _get_api_key()
     params = {"key": key, "q": location, "dt": date}
-    payload = await _get_json(HISTORY_URL, params)
+    payload = await _get_json(HISTORY_URL, params, client)
     forecastday = payload.get("forecast", {}).get("forecastday", [])
     if not forecastday:
         raise WeatherAPIError("No historical data found.")
@@ -65,10 +155,73 @@ async def get_weather_history(location: str, date: str) -> Dict[str, List[Any]]:
     return {"times": times, "temps": temps, "dewpoints": dewpoints}
 
 
-async def get_forecast(location: str, days: int = 3) -> Dict[str, Any]:
+async def get_weather_history_range(
+    location: str,
+    days: int,
+    *,
+    end: dt.date | None = None,
+    client: httpx.AsyncClient | None = None,
+    concurrency: int = 4,
+) -> Dict[str, List[Any]]:
+    """
+    Hourly history for ``days`` consecutive days ending at ``end`` (default today, UTC).
+
+    Days are fetched concurrently, at most ``concurrency`` at a time, and
+    finished days come from the per-day cache. Days that fail (for example,
+    older than the plan's history limit) are left out and listed under
+    ``missing_days``; only if every day fails is the error raised.
+    """
+    end = end or dt.datetime.now(dt.timezone.utc).date()
+    dates = [(end - dt.timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_day(date: str) -> Dict[str, List[Any]]:
+        async with semaphore:
+            return await get_weather_history(location, date, client=client)
+
+    results = await asyncio.gather(*(fetch_day(date) for date in dates), return_exceptions=True)
+    merged: Dict[str, List[Any]] = {"times": [], "temps": [], "dewpoints": [], "missing_days": []}
+    errors = []
+    for date, day in zip(dates, results):
+        if isinstance(day, BaseException):
+            if not isinstance(day, Exception):
+                raise day
+            log.warning("WeatherAPI history for %s on %s failed: %s", location, date, day)
+            merged["missing_days"].append(date)
+            errors.append(day)
+            continue
+        for time, temp, dewpoint in zip(day["times"], day["temps"], day["dewpoints"]):
+            # An empty time would become NaT, which the graph's NaN filtering does not catch.
+            if not time:
+                continue
+            merged["times"].append(time)
+            merged["temps"].append(temp)
+            merged["dewpoints"].append(dewpoint)
+    if len(errors) == len(dates):
+        raise errors[-1]
+    return merged
+
+
+async def get_forecast(
+    location: str, days: int = 3, *, client: httpx.AsyncClient | None = None
+) -> Dict[str, Any]:
+    ttl, stale_ttl = FORECAST_TTL
+    return await _cache.get_or_fetch(
+        ("forecast", _normalize_location(location), days),
+        lambda: _fetch_forecast(location, days, client),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+    )
+
+
+async def _fetch_forecast(location: str, days: int, client: httpx.AsyncClient | None) -> Dict[str, Any]:
     key = _get_api_key()
     params = {"key": key, "q": location, "days": days, "aqi": "yes", "alerts": "yes"}
-    payload = await _get_json(FORECAST_URL, params)
+    payload = await _get_json(FORECAST_URL, params, client)
+    return _parse_forecast(payload)
+
+
+def _parse_forecast(payload: Dict[str, Any]) -> Dict[str, Any]:
     forecast_days = []
     for day in payload.get("forecast", {}).get("forecastday", []):
         forecast_days.append(
@@ -86,3 +239,157 @@ async def get_forecast(location: str, days: int = 3) -> Dict[str, Any]:
         )
     alerts = payload.get("alerts", {}).get("alert", [])
     return {"days": forecast_days, "alerts": alerts}
+
+
+async def get_current_weather_bulk(
+    locations: Iterable[str],
+    *,
+    client: httpx.AsyncClient | None = None,
+    concurrency: int = 8,
+) -> Dict[str, Dict[str, Any] | Exception]:
+    """
+    Current weather for many locations, keyed by each location as given.
+
+    Equivalent locations are fetched once; see ``_resolve_bulk``.
+    """
+    ttl, _ = CURRENT_TTL
+    return await _resolve_bulk(
+        locations,
+        endpoint="current",
+        url=CURRENT_URL,
+        params={"aqi": "yes"},
+        parse=_parse_current,
+        single=lambda loc: get_current_weather(loc, client=client),
+        ttl=ttl,
+        client=client,
+        concurrency=concurrency,
+    )
+
+
+async def get_forecast_bulk(
+    locations: Iterable[str],
+    days: int = 3,
+    *,
+    client: httpx.AsyncClient | None = None,
+    concurrency: int = 8,
+) -> Dict[str, Dict[str, Any] | Exception]:
+    ttl, _ = FORECAST_TTL
+    return await _resolve_bulk(
+        locations,
+        endpoint="forecast",
+        url=FORECAST_URL,
+        params={"days": days, "aqi": "yes", "alerts": "yes"},
+        parse=_parse_forecast,
+        single=lambda loc: get_forecast(loc, days, client=client),
+        ttl=ttl,
+        client=client,
+        concurrency=concurrency,
+        key_suffix=(days,),
+    )
+
+
+async def _resolve_bulk(
+    locations: Iterable[str],
+    *,
+    endpoint: str,
+    url: str,
+    params: Dict[str, Any],
+    parse: Callable[[Dict[str, Any]], Dict[str, Any]],
+    single: Callable[[str], Awaitable[Dict[str, Any]]],
+    ttl: float,
+    client: httpx.AsyncClient | None,
+    concurrency: int,
+    key_suffix: Tuple[Any, ...] = (),
+) -> Dict[str, Dict[str, Any] | Exception]:
+    """
+    De-duplicate locations, answer what the cache already has, and fetch the
+    rest with WeatherAPI bulk requests. Falls back to bounded concurrent
+    single requests when the plan has no bulk access.
+    """
+    global _bulk_supported
+    callers: Dict[str, List[str]] = {}
+    for location in locations:
+        callers.setdefault(_normalize_location(location), []).append(location)
+
+    resolved: Dict[str, Dict[str, Any] | Exception] = {}
+    missing: Dict[str, str] = {}
+    for norm, originals in callers.items():
+        cached = _cache.peek((endpoint, norm, *key_suffix))
+        if cached is not None:
+            resolved[norm] = cached
+        else:
+            missing[norm] = originals[0]
+
+    if missing and _bulk_supported:
+        norms = list(missing)
+        for start in range(0, len(norms), BULK_MAX_LOCATIONS):
+            chunk = norms[start : start + BULK_MAX_LOCATIONS]
+            try:
+                results = await _post_bulk(url, params, {norm: missing[norm] for norm in chunk}, parse, client)
+            except _BulkUnavailable as exc:
+                _bulk_supported = False
+                log.info("WeatherAPI bulk requests unavailable, using single requests: %s", exc)
+                break
+            except _BulkRejected as exc:
+                # One bad query can fail the whole chunk; only its locations go single.
+                log.warning("WeatherAPI rejected a bulk chunk, retrying it singly: %s", exc)
+                continue
+            except (WeatherAPIError, UpstreamUnavailable, httpx.HTTPError, ValueError) as exc:
+                # Network errors, an open circuit or an unreadable body: each location
+                # still gets its own request (and its own error) below.
+                log.warning("WeatherAPI bulk request failed, retrying singly: %s", exc)
+                break
+            for norm, result in results.items():
+                resolved[norm] = result
+                if not isinstance(result, Exception):
+                    await _cache.put((endpoint, norm, *key_suffix), result, ttl=ttl)
+
+    pending = [norm for norm in missing if norm not in resolved]
+    if pending:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_one(norm: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await single(missing[norm])
+
+        results = await asyncio.gather(*(fetch_one(norm) for norm in pending), return_exceptions=True)
+        resolved.update(zip(pending, results))
+
+    return {
+        original: resolved[norm]
+        for norm, originals in callers.items()
+        for original in originals
+    }
+
+
+async def _post_bulk(
+    url: str,
+    params: Dict[str, Any],
+    queries: Dict[str, str],
+    parse: Callable[[Dict[str, Any]], Dict[str, Any]],
+    client: httpx.AsyncClient | None,
+) -> Dict[str, Dict[str, Any] | Exception]:
+    body = {"locations": [{"q": q, "custom_id": custom_id} for custom_id, q in queries.items()]}
+    async with borrow(client) as http:
+        resp = await upstream("weatherapi").request(
+            http, "POST", url, params={"key": _get_api_key(), "q": "bulk", **params}, json=body
+        )
+        if resp.status_code in (401, 403):
+            raise _BulkUnavailable(f"WeatherAPI bulk requests not allowed: {resp.text}")
+        if resp.status_code == 400:
+            raise _BulkRejected(f"WeatherAPI bulk request rejected: {resp.text}")
+        if resp.status_code != 200:
+            raise WeatherAPIError(f"WeatherAPI bulk request failed: {resp.text}")
+        payload = resp.json()
+
+    results: Dict[str, Dict[str, Any] | Exception] = {}
+    for item in payload.get("bulk", []):
+        query = item.get("query", {})
+        custom_id = query.get("custom_id")
+        if custom_id not in queries:
+            continue
+        if "error" in query:
+            results[custom_id] = WeatherAPIError(query["error"].get("message", "Location not found."))
+        else:
+            results[custom_id] = parse(query)
+    return results
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, List
+
+from api_clients.http import HttpClients
+from benchmarks.fixtures import Upstreams
+from config import Settings
+from graphing.render_service import RenderService
+
+
+@dataclass
+class Sent:
+    at: float
+    content: str | None
+    ephemeral: bool
+    attachment_bytes: int
+
+
+class FakeResponse:
+    def __init__(self) -> None:
+        self.deferred_at: float | None = None
+
+    async def defer(self, **_: Any) -> None:
+        self.deferred_at = time.perf_counter()
+
+
+class FakeFollowup:
+    def __init__(self) -> None:
+        self.sent: List[Sent] = []
+
+    async def send(self, content: str | None = None, *, file: Any = None, ephemeral: bool = False, **_: Any) -> None:
+        size = 0
+        if file is not None:
+            # Read the attachment the way discord.py would when uploading it.
+            size = len(file.fp.read())
+            file.close()
+        self.sent.append(Sent(time.perf_counter(), content, ephemeral, size))
+
+
+@dataclass
+class FakeInteraction:
+    """
+    Just enough of ``discord.Interaction`` for the command handlers.
+    """
+
+    command_name: str
+    response: FakeResponse = field(default_factory=FakeResponse)
+    followup: FakeFollowup = field(default_factory=FakeFollowup)
+
+    @property
+    def command(self) -> SimpleNamespace:
+        return SimpleNamespace(qualified_name=self.command_name)
+
+    @property
+    def failed(self) -> bool:
+        return any(sent.ephemeral for sent in self.followup.sent)
+
+
+class FakeBot:
+    """
+    Carries the attributes cogs read from ``GeoLiveBot``, wired to local upstreams.
+    """
+
+    def __init__(self, settings: Settings, upstreams: Upstreams) -> None:
+        self.settings = settings
+        self.http_clients = HttpClients(transport=upstreams.transport())
+        self.renderer = RenderService.from_settings(settings)
+
+    def is_leader(self, lease: str) -> bool:
+        return True
+
+    async def close(self) -> None:
+        await self.http_clients.aclose()
+        await self.renderer.close()
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import random
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+
+PLACES = (
+    ("Ridgecrest", "California", "United States of America", 35.62, -117.67),
+    ("Anchorage", "Alaska", "United States of America", 61.22, -149.9),
+    ("Tokyo", "Tokyo", "Japan", 35.69, 139.69),
+    ("Santiago", "Region Metropolitana", "Chile", -33.45, -70.67),
+    ("Reykjavik", "Capital Region", "Iceland", 64.15, -21.94),
+    ("Wellington", "Wellington", "New Zealand", -41.29, 174.78),
+    ("Istanbul", "Istanbul", "Turkey", 41.01, 28.98),
+    ("Berlin", "Berlin", "Germany", 52.52, 13.4),
+)
+
+# Feature counts roughly matching the live USGS summary feeds.
+FEED_SIZES = {
+    "all_hour.geojson": 12,
+    "all_day.geojson": 300,
+    "all_week.geojson": 2000,
+    "all_month.geojson": 9000,
+}
+
+DONKI_TYPES = ("FLR", "CME", "GST", "IPS", "SEP", "RBE", "Report")
+
+
+def usgs_feed(count: int, *, seed: int = 0, now_ms: int | None = None) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    now_ms = now_ms or int(dt.datetime.now(dt.timezone.utc).timestamp() * 1000)
+    features = []
+    for i in range(count):
+        name, region, _, lat, lon = rng.choice(PLACES)
+        # Most events are small and cluster near known seismic zones.
+        mag = round(min(8.5, rng.expovariate(1.1)), 2)
+        event_time = now_ms - rng.randrange(0, 30 * 24 * 3600 * 1000)
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {
+                    "mag": mag,
+                    "place": f"{rng.randint(1, 80)} km {rng.choice('NESW')} of {name}, {region}",
+                    "time": event_time,
+                    "updated": event_time + rng.randrange(0, 3600 * 1000),
+                    "url": f"https://earthquake.usgs.gov/earthquakes/eventpage/bm{seed}{i:06d}",
+                    "felt": None,
+                    "status": "automatic",
+                    "tsunami": 0,
+                    "type": "earthquake",
+                    "title": f"M {mag} - {name}",
+                },
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [
+                        round(lon + rng.uniform(-3, 3), 4),
+                        round(lat + rng.uniform(-3, 3), 4),
+                        round(rng.uniform(0, 120), 2),
+                    ],
+                },
+                "id": f"bm{seed}{i:06d}",
+            }
+        )
+    features.sort(key=lambda f: f["properties"]["time"], reverse=True)
+    return {
+        "type": "FeatureCollection",
+        "metadata": {"generated": now_ms, "status": 200, "count": count},
+        "features": features,
+    }
+
+
+def _location(index: int) -> Dict[str, Any]:
+    name, region, country, lat, lon = PLACES[index % len(PLACES)]
+    return {
+        "id": 2800000 + index,
+        "name": name,
+        "region": region,
+        "country": country,
+        "lat": lat,
+        "lon": lon,
+        "tz_id": "UTC",
+        "localtime": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def _place_index(query: str) -> int:
+    if query.startswith("id:"):
+        return int(query[3:]) - 2800000
+    return int(hashlib.sha1(query.casefold().encode()).hexdigest(), 16) % len(PLACES)
+
+
+def weather_current(query: str) -> Dict[str, Any]:
+    rng = random.Random(query)
+    return {
+        "location": _location(_place_index(query)),
+        "current": {
+            "temp_c": round(rng.uniform(-10, 35), 1),
+            "dewpoint_c": round(rng.uniform(-15, 20), 1),
+            "humidity": rng.randint(20, 100),
+            "wind_kph": round(rng.uniform(0, 60), 1),
+            "uv": rng.randint(0, 10),
+            "condition": {"text": "Partly cloudy", "icon": "//cdn.weatherapi.com/weather/64x64/day/116.png"},
+            "air_quality": {"pm2_5": round(rng.uniform(1, 80), 1), "pm10": round(rng.uniform(1, 120), 1)},
+        },
+    }
+
+
+def _hours(date: str, rng: random.Random) -> List[Dict[str, Any]]:
+    base = rng.uniform(0, 25)
+    return [
+        {
+            "time": f"{date} {hour:02d}:00",
+            "temp_c": round(base + 6 * (1 - abs(hour - 14) / 14) + rng.uniform(-1, 1), 1),
+            "dewpoint_c": round(base - 4 + rng.uniform(-1, 1), 1),
+            "humidity": rng.randint(30, 95),
+            "wind_kph": round(rng.uniform(0, 40), 1),
+        }
+        for hour in range(24)
+    ]
+
+
+def weather_history(query: str, date: str) -> Dict[str, Any]:
+    rng = random.Random(f"{query}:{date}")
+    return {
+        "location": _location(_place_index(query)),
+        "forecast": {"forecastday": [{"date": date, "hour": _hours(date, rng)}]},
+    }
+
+
+def weather_forecast(query: str, days: int) -> Dict[str, Any]:
+    rng = random.Random(f"{query}:forecast")
+    today = dt.date.today()
+    forecastday = []
+    for offset in range(days):
+        date = (today + dt.timedelta(days=offset)).isoformat()
+        forecastday.append(
+            {
+                "date": date,
+                "day": {
+                    "avgtemp_c": round(rng.uniform(0, 25), 1),
+                    "maxtemp_c": round(rng.uniform(10, 35), 1),
+                    "mintemp_c": round(rng.uniform(-10, 10), 1),
+                    "uv": rng.randint(0, 10),
+                    "condition": {"text": "Sunny", "icon": "//cdn.weatherapi.com/weather/64x64/day/113.png"},
+                    "air_quality": {"pm2_5": round(rng.uniform(1, 80), 1), "pm10": round(rng.uniform(1, 120), 1)},
+                },
+                "hour": _hours(date, rng),
+            }
+        )
+    return {
+        "location": _location(_place_index(query)),
+        "current": weather_current(query)["current"],
+        "forecast": {"forecastday": forecastday},
+        "alerts": {"alert": []},
+    }
+
+
+def weather_search(query: str) -> List[Dict[str, Any]]:
+    location = _location(_place_index(query))
+    return [{key: location[key] for key in ("id", "name", "region", "country", "lat", "lon")}]
+
+
+def donki_notifications(count: int = 40, *, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    now = dt.datetime.now(dt.timezone.utc)
+    items = []
+    for i in range(count):
+        issued = now - dt.timedelta(minutes=rng.randrange(0, 30 * 24 * 60))
+        kind = rng.choice(DONKI_TYPES)
+        items.append(
+            {
+                "messageType": kind,
+                "messageID": f"{issued:%Y%m%d}-AL-{i:03d}",
+                "messageURL": f"https://kauai.ccmc.gsfc.nasa.gov/DONKI/view/Alert/{i}/1",
+                "messageIssueTime": issued.strftime("%Y-%m-%dT%H:%MZ"),
+                "messageBody": (
+                    f"## NASA Goddard Space Flight Center, Space Weather Research Center ( SWRC )\n"
+                    f"## Message Type: {kind}\n##\n## Summary:\n" + "Lorem ipsum dolor sit amet. " * 40
+                ),
+            }
+        )
+    return items
+
+
+def iss_now(seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    return {
+        "message": "success",
+        "timestamp": int(dt.datetime.now(dt.timezone.utc).timestamp()),
+        "iss_position": {
+            "latitude": f"{rng.uniform(-51.6, 51.6):.4f}",
+            "longitude": f"{rng.uniform(-180, 180):.4f}",
+        },
+    }
+
+
+async def _chunked(body: bytes, size: int = 16384) -> AsyncIterator[bytes]:
+    # Large feeds arrive in network-sized pieces, so streaming parsers see real chunking.
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+class Upstreams:
+    """
+    ``httpx.MockTransport`` stand-in for every upstream the bot talks to.
+
+    Each host answers after ``latency`` seconds (log-normally jittered by
+    ``jitter``) with synthetic payloads shaped like the real APIs. USGS feeds
+    honour ``If-None-Match`` so conditional polling behaves as in production.
+    """
+
+    HOSTS = {
+        "earthquake.usgs.gov": "usgs",
+        "api.weatherapi.com": "weatherapi",
+        "api.nasa.gov": "nasa",
+        "api.open-notify.org": "opennotify",
+    }
+
+    def __init__(self, *, latency: float = 0.08, jitter: float = 0.3, seed: int = 0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.requests: Counter[str] = Counter()
+        self._rng = random.Random(seed)
+        self._bodies: Dict[str, bytes] = {}
+        self._donki = donki_notifications(seed=seed)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        upstream = self.HOSTS.get(request.url.host)
+        if upstream is None:
+            return httpx.Response(404, json={"error": f"no stand-in for {request.url.host}"})
+        self.requests[upstream] += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency * self._rng.lognormvariate(0, self.jitter))
+        return getattr(self, f"_{upstream}")(request)
+
+    def _json(self, key: str, build: Any, request: httpx.Request, *, conditional: bool = False) -> httpx.Response:
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._bodies[key] = json.dumps(build()).encode()
+        if not conditional:
+            return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, content=_chunked(body), headers={"Content-Type": "application/json", "ETag": etag})
+
+    def _usgs(self, request: httpx.Request) -> httpx.Response:
+        feed = request.url.path.rsplit("/", 1)[-1]
+        count = FEED_SIZES.get(feed)
+        if count is None:
+            return httpx.Response(404)
+        return self._json(feed, lambda: usgs_feed(count, seed=count), request, conditional=True)
+
+    def _weatherapi(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path.rsplit("/", 1)[-1]
+        query = request.url.params.get("q", "")
+        if query == "bulk":
+            return self._weatherapi_bulk(request, endpoint)
+        if endpoint == "search.json":
+            return httpx.Response(200, json=weather_search(query))
+        if endpoint == "current.json":
+            return httpx.Response(200, json=weather_current(query))
+        if endpoint == "history.json":
+            date = request.url.params.get("dt", dt.date.today().isoformat())
+            return self._json(f"history:{query}:{date}", lambda: weather_history(query, date), request)
+        if endpoint == "forecast.json":
+            days = int(request.url.params.get("days", "3"))
+            return httpx.Response(200, json=weather_forecast(query, days))
+        return httpx.Response(400, json={"error": {"code": 1005, "message": "API URL is invalid."}})
+
+    def _weatherapi_bulk(self, request: httpx.Request, endpoint: str) -> httpx.Response:
+        days = int(request.url.params.get("days", "3"))
+        bulk = []
+        for item in json.loads(request.content).get("locations", []):
+            payload = weather_current(item["q"]) if endpoint == "current.json" else weather_forecast(item["q"], days)
+            bulk.append({"query": {"custom_id": item.get("custom_id"), "q": item["q"], **payload}})
+        return httpx.Response(200, json={"bulk": bulk})
+
+    def _nasa(self, request: httpx.Request) -> httpx.Response:
+        start = request.url.params.get("startDate", "")
+        return httpx.Response(200, json=[item for item in self._donki if item["messageIssueTime"] >= start])
+
+    def _opennotify(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=iss_now(self.requests["opennotify"]))
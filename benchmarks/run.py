@@ -0,0 +1,316 @@
+"""
+Offline benchmarks for the bot's commands and charts.
+
+    python -m benchmarks.run                      # cold caches, 80ms upstreams
+    python -m benchmarks.run --warm --latency 0.2
+    python -m benchmarks.run --compare benchmarks/results/<commit>.json
+
+Every upstream is served by ``benchmarks.fixtures.Upstreams``, so no
+network access or API keys are needed. Results are written as JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# (name, cog, command, arguments)
+SCENARIOS: Tuple[Tuple[str, str, str, Dict[str, Any]], ...] = (
+    ("weather now", "weather", "now", {"location": "Berlin"}),
+    ("weather forecast", "weather", "forecast", {"location": "Tokyo"}),
+    ("weather graph", "weather", "graph", {"location": "Reykjavik", "days": 1}),
+    ("weather graph 7d", "weather", "graph", {"location": "Reykjavik", "days": 7}),
+    ("disaster quake", "disaster", "quake", {}),
+    ("disaster near", "disaster", "near", {"location": "Tokyo", "radius": 1000}),
+    ("space aurora", "space", "aurora", {}),
+    ("space iss", "space", "iss", {}),
+)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def summarize_ms(samples: Sequence[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in samples]
+    return {
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+def _git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def _reset_caches(bot: Any) -> None:
+    from api_clients import weatherapi
+    from api_clients.donki_store import get_store
+    from api_clients.persistent_cache import get_persistent_cache
+
+    weatherapi._cache.clear()
+    get_store().clear()
+    get_persistent_cache().clear()
+    bot.renderer.clear_cache()
+
+
+async def _build_cogs(bot: Any) -> Dict[str, Any]:
+    from cogs.commands.disaster import Disaster
+    from cogs.commands.space import Space
+    from cogs.commands.weather import Weather
+
+    disaster = Disaster(bot)
+    disaster.refresh_index.cancel()
+    # Fill the quake index once, as the background loop would after startup.
+    await disaster.refresh_index()
+    space = Space(bot)
+    space.sync_donki.cancel()
+    return {"weather": Weather(bot), "space": space, "disaster": disaster}
+
+
+async def _run_command(cog: Any, command: str, arguments: Dict[str, Any], name: str) -> Tuple[float, bool]:
+    from benchmarks.fakes import FakeInteraction
+
+    interaction = FakeInteraction(name)
+    callback = getattr(cog, command).callback
+    started = time.perf_counter()
+    await callback(cog, interaction, **arguments)
+    finished = interaction.followup.sent[-1].at if interaction.followup.sent else time.perf_counter()
+    return finished - started, interaction.failed
+
+
+async def bench_commands(bot: Any, upstreams: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    cogs = await _build_cogs(bot)
+    results: Dict[str, Any] = {}
+    for name, cog_name, command, arguments in SCENARIOS:
+        if args.only and not any(part in name for part in args.only):
+            continue
+        cog = cogs[cog_name]
+        # One untimed run pays for imports, worker start-up and location lookups.
+        await _run_command(cog, command, arguments, name)
+
+        samples: List[float] = []
+        failures = 0
+        requests_before = sum(upstreams.requests.values())
+        for _ in range(args.iterations):
+            if not args.warm:
+                _reset_caches(bot)
+            elapsed, failed = await _run_command(cog, command, arguments, name)
+            samples.append(elapsed)
+            failures += failed
+        requests = sum(upstreams.requests.values()) - requests_before
+
+        # Memory is measured in a separate pass; tracing slows every allocation.
+        peaks: List[int] = []
+        tracemalloc.start()
+        for _ in range(args.memory_iterations):
+            if not args.warm:
+                _reset_caches(bot)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await _run_command(cog, command, arguments, name)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+
+        results[name] = {
+            "iterations": args.iterations,
+            "failures": failures,
+            **summarize_ms(samples),
+            "upstream_requests_per_call": round(requests / args.iterations, 2),
+            "peak_kib": round(percentile(peaks, 50) / 1024, 1) if peaks else None,
+        }
+        print(f"  {name:<20} p50 {results[name]['p50_ms']:>8.1f} ms  p99 {results[name]['p99_ms']:>8.1f} ms")
+    return results
+
+
+def _chart_cases() -> Dict[str, Callable[[], bytes]]:
+    from api_clients.quake_batch import QuakeBatch
+    from api_clients.usgs import parse_features
+    from benchmarks.fixtures import usgs_feed, weather_history
+    from graphing.earthquake_map import create_earthquake_map
+    from graphing.heatmap import world_heatmap
+    from graphing.weather_graph import create_weather_graph
+
+    quakes = QuakeBatch.from_records(parse_features(usgs_feed(1000, seed=1)))
+    today = dt.date.today()
+    days = [weather_history("Berlin", (today - dt.timedelta(days=i)).isoformat()) for i in range(29, -1, -1)]
+    hours = [h for day in days for h in day["forecast"]["forecastday"][0]["hour"]]
+
+    def weather(series: List[Dict[str, Any]]) -> Callable[[], bytes]:
+        times = [h["time"] for h in series]
+        temps = [h["temp_c"] for h in series]
+        dewpoints = [h["dewpoint_c"] for h in series]
+        return lambda: create_weather_graph(times, temps, dewpoints, "Berlin")
+
+    return {
+        "earthquake_map": lambda: create_earthquake_map(35.62, -117.67, 5.4, "Ridgecrest, CA"),
+        "heatmap_20": lambda: world_heatmap(quakes[:20], "Latest Earthquakes"),
+        "heatmap_1000": lambda: world_heatmap(quakes, "Latest Earthquakes"),
+        "weather_graph_1d": weather(hours[-24:]),
+        "weather_graph_30d": weather(hours),
+    }
+
+
+def bench_renders(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Render each chart type in-process, as a render worker would.
+    """
+    results: Dict[str, Any] = {}
+    for name, render in _chart_cases().items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        png = render()  # builds cached basemaps and fonts
+        samples: List[float] = []
+        started = time.perf_counter()
+        for _ in range(args.render_iterations):
+            t0 = time.perf_counter()
+            render()
+            samples.append(time.perf_counter() - t0)
+        total = time.perf_counter() - started
+
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        render()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+
+        results[name] = {
+            "iterations": args.render_iterations,
+            "renders_per_sec": round(args.render_iterations / total, 2),
+            **summarize_ms(samples),
+            "png_kib": round(len(png) / 1024, 1),
+            "peak_kib": round(peak / 1024, 1),
+        }
+        print(f"  {name:<20} {results[name]['renders_per_sec']:>8.1f} renders/s  p50 {results[name]['p50_ms']:>7.1f} ms")
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    base_rev = baseline.get("meta", {}).get("commit")
+    print(f"\nCompared with {base_rev}:")
+    for name, row in current.get("commands", {}).items():
+        old = baseline.get("commands", {}).get(name)
+        if old:
+            print(
+                f"  {name:<20} p50 {delta(row['p50_ms'], old['p50_ms']):>8}  "
+                f"p95 {delta(row['p95_ms'], old['p95_ms']):>8}  p99 {delta(row['p99_ms'], old['p99_ms']):>8}"
+            )
+    for name, row in current.get("renders", {}).items():
+        old = baseline.get("renders", {}).get(name)
+        if old:
+            print(f"  {name:<20} throughput {delta(row['renders_per_sec'], old['renders_per_sec']):>8}")
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    from api_clients import donki_store, locations, persistent_cache
+    from benchmarks.fakes import FakeBot
+    from benchmarks.fixtures import Upstreams
+    from config import Settings
+
+    workdir = Path(tempfile.mkdtemp(prefix="geolive-bench-"))
+    persistent_cache.configure(path=workdir / "response_cache.db")
+    donki_store.configure(path=workdir / "donki.db")
+    locations._resolver = locations.LocationResolver(workdir / "locations.db")
+
+    upstreams = Upstreams(latency=args.latency, jitter=args.jitter, seed=args.seed)
+    settings = Settings(
+        discord_token="",
+        weather_api_key="benchmark",
+        nasa_key="benchmark",
+        render_workers=args.workers,
+    )
+    bot = FakeBot(settings, upstreams)
+    bot.renderer.start()
+    report: Dict[str, Any] = {}
+    try:
+        if not args.skip_commands:
+            print("Commands:")
+            report["commands"] = await bench_commands(bot, upstreams, args)
+    finally:
+        await bot.close()
+    if not args.skip_renders:
+        print("Renders:")
+        report["renders"] = bench_renders(args)
+    report["upstream_requests"] = dict(upstreams.requests)
+    return report
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30, help="timed runs per command")
+    parser.add_argument("--memory-iterations", type=int, default=3, help="traced runs per command")
+    parser.add_argument("--render-iterations", type=int, default=10, help="timed renders per chart")
+    parser.add_argument("--latency", type=float, default=0.08, help="median upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="log-normal sigma applied to latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="render worker processes")
+    parser.add_argument("--warm", action="store_true", help="keep response caches between runs")
+    parser.add_argument("--only", nargs="*", help="run scenarios whose name contains any of these")
+    parser.add_argument("--skip-commands", action="store_true")
+    parser.add_argument("--skip-renders", action="store_true")
+    parser.add_argument("--output", type=Path, help="JSON file to write (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier JSON result to diff against")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    os.environ.setdefault("WEATHER_API_KEY", "benchmark")
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    revision = _git_revision()
+    report: Dict[str, Any] = {
+        "meta": {
+            **revision,
+            "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        }
+    }
+    report.update(asyncio.run(_main(args)))
+
+    output = args.output or RESULTS_DIR / f"{revision['commit'] or 'local'}{'-dirty' if revision['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nWrote {output}")
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,77 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Deque, Dict, List, Set, Tuple
 
 import discord
 from discord.ext import commands, tasks
 
-from api_clients import usgs
+import metrics
+from api_clients import opennotify, usgs, weatherapi
+from api_clients.locations import resolve_location
+from cogs.commands.space import iss_embed
+from cogs.commands.weather import current_weather_embed
 from config import Settings
-from embeds.geolive import geo_card
+from embeds.geolive import apply_branding, geo_card
 from embeds.style import thin
-from graphing.earthquake_map import create_earthquake_map
-from dashboard.utils.storage import default_config
+from feeds.delivery import DeliveryEngine, DeliveryJob, FeedChannelCache
+from feeds.leader import AUTO_FEED_LEASE, UPSTREAM_LEASE
+from feeds.proximity import WatchRegions
+from feeds.scheduler import FeedScheduler
+from feeds.shared import ISS_POSITION, QUAKE_DELTAS, get_shared_log
+from graphing.output import png_stream
+from graphing.render_service import RenderService
+from dashboard.utils.storage import GuildConfigStore, get_store
 
 log = logging.getLogger(__name__)
 
+TICK_SECONDS = 30
+QUAKE_POLL_SECONDS = 60
+# Deltas older than the longest selectable interval can no longer be due anywhere.
+QUAKE_RETENTION_SECONDS = 12 * 3600
+QUAKE_MAP = "graphing.earthquake_map:create_earthquake_map"
+# How often the coordinator republishes the ISS position, and how old a
+# shared position workers still accept before fetching it themselves.
+ISS_SHARE_SECONDS = 60
+ISS_MAX_AGE_SECONDS = 5 * 60
 
-async def send_earthquake_embed(
-    channel: discord.abc.Messageable,
+TICK_DURATION = metrics.histogram("geolive_auto_feed_tick_seconds", "Duration of one auto feed tick.")
+GUILDS_DUE = metrics.counter("geolive_auto_feed_guilds_total", "Guild feeds that came due.", ["feed"])
+
+
+@dataclass(frozen=True)
+class QuakeAlert:
+    """
+    A rendered alert shared by every destination in a tick.
+    """
+
+    png: bytes
+    embed: Dict[str, Any]
+
+
+async def build_earthquake_alert(
+    renderer: RenderService,
     magnitude: float,
     place: str,
     lat: float,
     lon: float,
     depth: float,
     *,
-    primary_color: int | None = None,
-    icon_url: str | None = None,
-) -> None:
-    map_path = create_earthquake_map(lat, lon, magnitude, place)
-    file = discord.File(map_path, filename="quake.png")
+    previous_magnitude: float | None = None,
+) -> QuakeAlert:
+    png = await renderer.render_cached(QUAKE_MAP, lat, lon, magnitude, place)
 
-    embed = geo_card("GeoLive Earthquake Alert", color=primary_color, icon_url=icon_url)
+    title = "GeoLive Earthquake Alert" if previous_magnitude is None else "GeoLive Earthquake Update"
+    magnitude_text = str(magnitude) if previous_magnitude is None else f"{magnitude} (was {previous_magnitude})"
+    embed = geo_card(title)
     embed.add_field(name="📍 Location", value=place, inline=False)
-    embed.add_field(name="🌡️ Magnitude", value=str(magnitude), inline=True)
+    embed.add_field(name="🌡️ Magnitude", value=magnitude_text, inline=True)
     embed.add_field(name="📊 Depth", value=f"{depth} km", inline=True)
     embed.add_field(name="🌐 Latitude", value=str(lat), inline=True)
     embed.add_field(name="🌍 Longitude", value=str(lon), inline=True)
@@ -42,89 +82,371 @@ async def send_earthquake_embed(
     )
     embed.set_image(url="attachment://quake.png")
     embed.set_footer(text="Data source: USGS Earthquake Hazards Program")
+    return QuakeAlert(png=png, embed=embed.to_dict())
 
+
+async def send_earthquake_alert(
+    alert: QuakeAlert,
+    channel: discord.abc.Messageable,
+    *,
+    primary_color: int | None = None,
+    icon_url: str | None = None,
+) -> None:
+    embed = discord.Embed.from_dict(copy.deepcopy(alert.embed))
+    apply_branding(embed, color=primary_color, icon_url=icon_url)
+    file = discord.File(png_stream(alert.png), filename="quake.png")
     await channel.send(embed=embed, file=file)
 
 
+def _magnitude_key(quake: dict) -> float:
+    mag = quake.get("magnitude")
+    return float(mag) if isinstance(mag, (int, float)) else 0.0
+
+
+def parse_color(val) -> int:
+    if isinstance(val, int):
+        return val
+    if isinstance(val, str):
+        cleaned = val.strip()
+        if cleaned.startswith("#"):
+            cleaned = cleaned[1:]
+        try:
+            return int(cleaned, 16)
+        except Exception:
+            return 0x00AEEF
+    return 0x00AEEF
+
+
 class AutoFeed(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        settings: Settings = bot.settings  # type: ignore[attr-defined]
+        # Workers and standby replicas read upstream data the coordinator
+        # published instead of polling; see ``_polls_upstream``.
+        self.role = settings.bot_role
+        self.quake_feed: usgs.QuakeFeed | None = None
+        self._shared_seq: int | None = None
+        self._last_iss_share = 0.0
+        self.delivery = DeliveryEngine(concurrency=settings.auto_feed_concurrency)
+        self.channels = FeedChannelCache()
+        self.scheduler = FeedScheduler(default_hours=settings.auto_feed_hours)
+        self.regions = WatchRegions()
+        # (received_at, quake, ids of guilds whose watch regions matched) for
+        # deltas still inside the longest feed interval
+        self._recent_quakes: Deque[Tuple[float, Dict[str, Any], Set[int]]] = deque()
+        self._last_quake_poll = 0.0
+        self._last_run: Dict[int, float] = {}
+        self._scheduled = False
         self.auto_feed_task.start()
 
+    async def cog_load(self) -> None:
+        try:
+            count = await asyncio.to_thread(get_store().load_all)
+            log.info("Loaded %d guild configs", count)
+        except Exception as exc:
+            log.warning("Could not preload guild configs: %s", exc)
+
     def cog_unload(self) -> None:
         self.auto_feed_task.cancel()
 
-    @tasks.loop(hours=4)
+    @tasks.loop(seconds=TICK_SECONDS)
     async def auto_feed_task(self) -> None:
-        settings: Settings = self.bot.settings  # type: ignore[attr-defined]
+        with TICK_DURATION.time():
+            try:
+                await self._tick()
+            except Exception:
+                # tasks.loop stops for good on an unhandled error; skip this tick instead.
+                log.exception("Auto feed tick failed")
+
+    async def _tick(self) -> None:
+        self._sync_schedule()
+        await self._poll_quakes()
+        if self.role == "coordinator" and self._polls_upstream():
+            await self._share_iss()
+
+        if not self.bot.is_leader(AUTO_FEED_LEASE):  # type: ignore[attr-defined]
+            self._stand_by()
+            return
+
+        due: Dict[str, List[discord.Guild]] = defaultdict(list)
+        for guild_id, feed in self.scheduler.due():
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                self.scheduler.remove(guild_id)
+                continue
+            due[feed].append(guild)
+        if not due:
+            return
+        for feed, guilds in due.items():
+            GUILDS_DUE.inc(len(guilds), feed=feed)
+
+        store = get_store()
+        jobs: List[DeliveryJob] = []
+        jobs += await self._earthquake_jobs(due["earthquake"], store)
+        jobs += await self._weather_jobs(due["weather"], store)
+        jobs += await self._iss_jobs(due["iss"], store)
+        if not jobs:
+            return
+
+        report = await self.delivery.deliver(jobs)
+        for guild_id in report.forbidden_guilds:
+            self.channels.invalidate(guild_id)
+        log.info(
+            "Auto feed tick: %s, %s",
+            ", ".join(f"{feed}={len(guilds)}" for feed, guilds in due.items()),
+            report,
+        )
+
+    def _sync_schedule(self) -> None:
+        """
+        Schedule every guild on the first tick, then only guilds whose config changed.
+        """
         try:
-            quakes = await usgs.fetch_recent_earthquakes()
+            store = get_store()
+            changed = store.refresh()
         except Exception as exc:
-            log.error("Auto feed USGS fetch failed: %s", exc)
+            log.warning("Could not refresh guild configs: %s", exc)
             return
+        if not self._scheduled:
+            for guild in self.bot.guilds:
+                self._schedule_guild(guild.id, store.get(str(guild.id)))
+            self._scheduled = True
+            return
+        for guild_id in changed:
+            if self.bot.get_guild(int(guild_id)) is not None:
+                self._schedule_guild(int(guild_id), store.get(guild_id))
+
+    def _schedule_guild(self, guild_id: int, config: Dict[str, Any]) -> None:
+        self.scheduler.schedule(guild_id, config)
+        self.regions.update(guild_id, config)
+        self._last_run.setdefault(guild_id, time.time())
 
-        if not quakes:
+    async def _poll_quakes(self) -> None:
+        now = time.time()
+        if now - self._last_quake_poll < QUAKE_POLL_SECONDS:
+            return
+        self._last_quake_poll = now
+        try:
+            deltas = await self._fetch_quake_deltas()
+        except Exception as exc:
+            log.error("Auto feed USGS fetch failed: %s", exc)
             return
+        events = [q for q in deltas if None not in (q.get("lat"), q.get("lon"), q.get("magnitude"))]
+        for quake, matched in zip(events, self.regions.match(events)):
+            self._recent_quakes.append((now, quake, matched))
+        while self._recent_quakes and now - self._recent_quakes[0][0] > QUAKE_RETENTION_SECONDS:
+            self._recent_quakes.popleft()
 
-        top = quakes[0]
-        lat = top.get("lat")
-        lon = top.get("lon")
-        mag = top.get("magnitude")
-        depth = top.get("depth")
-        place = top.get("place")
+    def _polls_upstream(self) -> bool:
+        return self.role != "worker" and self.bot.is_leader(UPSTREAM_LEASE)  # type: ignore[attr-defined]
 
-        if None in (lat, lon, mag):
+    def _stand_by(self) -> None:
+        """
+        Consume due slots without sending, so taking over later does not replay a backlog.
+        """
+        now = time.time()
+        for guild_id, _feed in self.scheduler.due():
+            self._last_run[guild_id] = now
+
+    async def _fetch_quake_deltas(self) -> List[Dict[str, Any]]:
+        shared = get_shared_log()
+        if not self._polls_upstream():
+            self.quake_feed = None
+            if self._shared_seq is None:
+                # Start at the head: older deltas were already delivered by whoever saw them first.
+                self._shared_seq = await asyncio.to_thread(shared.last_seq, QUAKE_DELTAS)
+                return []
+            self._shared_seq, deltas = await asyncio.to_thread(shared.read, QUAKE_DELTAS, self._shared_seq)
+            return deltas
+        if self.quake_feed is None:
+            # Loads the seen-set the previous poller persisted, so a failover does not replay events.
+            self.quake_feed = usgs.QuakeFeed()
+            self._shared_seq = None
+        deltas = await self.quake_feed.poll(
+            client=self.bot.http_clients.get("usgs")  # type: ignore[attr-defined]
+        )
+        if self.role == "coordinator":
+            await asyncio.to_thread(shared.publish, QUAKE_DELTAS, deltas)
+            await asyncio.to_thread(shared.prune, QUAKE_DELTAS, time.time() - QUAKE_RETENTION_SECONDS)
+        return deltas
+
+    async def _share_iss(self) -> None:
+        now = time.time()
+        if now - self._last_iss_share < ISS_SHARE_SECONDS:
+            return
+        try:
+            position = await opennotify.fetch_iss_position(
+                client=self.bot.http_clients.get("opennotify")  # type: ignore[attr-defined]
+            )
+        except Exception as exc:
+            log.warning("Could not share ISS position: %s", exc)
             return
+        self._last_iss_share = now
+        shared = get_shared_log()
+        await asyncio.to_thread(shared.publish, ISS_POSITION, [position])
+        await asyncio.to_thread(shared.prune, ISS_POSITION, now - ISS_MAX_AGE_SECONDS)
 
-        def parse_color(val) -> int:
-            if isinstance(val, int):
-                return val
-            if isinstance(val, str):
-                cleaned = val.strip()
-                if cleaned.startswith("#"):
-                    cleaned = cleaned[1:]
-                try:
-                    return int(cleaned, 16)
-                except Exception:
-                    return 0x00AEEF
-            return 0x00AEEF
+    async def _iss_position(self) -> Dict[str, Any]:
+        if self.role != "standalone":
+            position = await asyncio.to_thread(get_shared_log().latest, ISS_POSITION, ISS_MAX_AGE_SECONDS)
+            if position is not None:
+                return position
+        return await opennotify.fetch_iss_position(
+            client=self.bot.http_clients.get("opennotify")  # type: ignore[attr-defined]
+        )
 
-        for guild in self.bot.guilds:
-            for channel in guild.text_channels:
-                if not channel.permissions_for(guild.me).send_messages:  # type: ignore[arg-type]
-                    continue
-                config = default_config()
-                try:
-                    from dashboard.utils.storage import get_guild_config
-                    config = get_guild_config(str(guild.id))
-                except Exception as exc:
-                    log.debug("Could not load guild config %s: %s", guild.id, exc)
-                if not config.get("earthquake_feed_enabled", True):
+    async def _earthquake_jobs(self, guilds: List[discord.Guild], store: GuildConfigStore) -> List[DeliveryJob]:
+        settings: Settings = self.bot.settings  # type: ignore[attr-defined]
+        now = time.time()
+        picks: Dict[int, List[Dict[str, Any]]] = {}
+        for guild in guilds:
+            since = self._last_run.get(guild.id, now)
+            self._last_run[guild.id] = now
+            # Guilds with watch regions only hear about quakes inside them.
+            watching = guild.id in self.regions
+            latest: Dict[str, Dict[str, Any]] = {}
+            for received_at, quake, matched in self._recent_quakes:
+                if received_at > since and (not watching or guild.id in matched):
+                    latest[quake["id"]] = quake
+            if latest:
+                picks[guild.id] = sorted(latest.values(), key=_magnitude_key, reverse=True)[
+                    : settings.auto_feed_max_events
+                ]
+        if not picks:
+            return []
+
+        # Render each event once per tick; guilds only differ in colour and icon.
+        events = {(q["id"], q.get("updated")): q for chosen in picks.values() for q in chosen}
+        renderer: RenderService = self.bot.renderer  # type: ignore[attr-defined]
+        results = await asyncio.gather(
+            *(
+                build_earthquake_alert(
+                    renderer,
+                    quake["magnitude"],
+                    quake.get("place"),
+                    quake["lat"],
+                    quake["lon"],
+                    quake.get("depth"),
+                    previous_magnitude=quake.get("previous_magnitude"),
+                )
+                for quake in events.values()
+            ),
+            return_exceptions=True,
+        )
+        alerts: Dict[Tuple[str, Any], QuakeAlert] = {}
+        for key, result in zip(events, results):
+            if isinstance(result, Exception):
+                log.error("Auto feed render failed for %s: %s", key[0], result)
+            else:
+                alerts[key] = result
+
+        jobs = []
+        for guild in guilds:
+            channel = self.channels.get(guild)
+            if channel is None or guild.id not in picks:
+                continue
+            config = store.get(str(guild.id))
+            for quake in picks[guild.id]:
+                alert = alerts.get((quake["id"], quake.get("updated")))
+                if alert is None:
                     continue
-                try:
-                    await send_earthquake_embed(
+                jobs.append(
+                    self.delivery.job(
+                        _magnitude_key(quake),
                         channel,
-                        mag,
-                        place,
-                        lat,
-                        lon,
-                        depth,
-                        primary_color=parse_color(config.get("primary_color")),
-                        icon_url=config.get("icon_url"),
+                        partial(
+                            send_earthquake_alert,
+                            alert,
+                            primary_color=parse_color(config.get("primary_color")),
+                            icon_url=config.get("icon_url"),
+                        ),
                     )
-                    break  # send to first channel per guild
-                except discord.Forbidden:
-                    continue
-                except Exception as exc:
-                    log.error("Auto feed send failed in %s: %s", channel, exc)
-                    continue
+                )
+        return jobs
+
+    async def _weather_jobs(self, guilds: List[discord.Guild], store: GuildConfigStore) -> List[DeliveryJob]:
+        by_location: Dict[str, List[Tuple[discord.Guild, Dict[str, Any]]]] = defaultdict(list)
+        for guild in guilds:
+            config = store.get(str(guild.id))
+            location = (config.get("weather_location") or "").strip()
+            if location:
+                by_location[location].append((guild, config))
+        if not by_location:
+            return []
+
+        client = self.bot.http_clients.get("weatherapi")  # type: ignore[attr-defined]
+        places = await asyncio.gather(
+            *(resolve_location(location, client=client) for location in by_location),
+            return_exceptions=True,
+        )
+        queries: Dict[str, str] = {}
+        for location, place in zip(by_location, places):
+            if isinstance(place, Exception):
+                log.error("Auto feed could not resolve %s: %s", location, place)
+            else:
+                queries[location] = place.query
+        results = await weatherapi.get_current_weather_bulk(set(queries.values()), client=client)
+        jobs = []
+        for location, query in queries.items():
+            targets = by_location[location]
+            current = results[query]
+            if isinstance(current, Exception):
+                log.error("Auto feed weather fetch failed for %s: %s", location, current)
+                continue
+            embed = current_weather_embed(current)
+            for guild, config in targets:
+                channel = self.channels.get(guild)
+                if channel is not None:
+                    jobs.append(self.delivery.job(0, channel, partial(_send_branded, embed, config)))
+        return jobs
+
+    async def _iss_jobs(self, guilds: List[discord.Guild], store: GuildConfigStore) -> List[DeliveryJob]:
+        if not guilds:
+            return []
+        try:
+            pos = await self._iss_position()
+        except Exception as exc:
+            log.error("Auto feed ISS fetch failed: %s", exc)
+            return []
+        embed = iss_embed(pos)
+        jobs = []
+        for guild in guilds:
+            channel = self.channels.get(guild)
+            if channel is not None:
+                config = store.get(str(guild.id))
+                jobs.append(self.delivery.job(0, channel, partial(_send_branded, embed, config)))
+        return jobs
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        if self._scheduled:
+            self._schedule_guild(guild.id, get_store().get(str(guild.id)))
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        self.channels.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self.channels.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.channels.invalidate(guild.id)
+        self.scheduler.remove(guild.id)
+        self.regions.remove(guild.id)
+        self._last_run.pop(guild.id, None)
 
     @auto_feed_task.before_loop
     async def before_auto_feed(self) -> None:
-        settings: Settings = self.bot.settings  # type: ignore[attr-defined]
-        self.auto_feed_task.change_interval(hours=settings.auto_feed_hours)
         await self.bot.wait_until_ready()
 
 
+async def _send_branded(embed: discord.Embed, config: Dict[str, Any], channel: discord.abc.Messageable) -> None:
+    branded = discord.Embed.from_dict(copy.deepcopy(embed.to_dict()))
+    apply_branding(branded, color=parse_color(config.get("primary_color")), icon_url=config.get("icon_url"))
+    await channel.send(embed=branded)
+
+
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(AutoFeed(bot))
@@ -1 +1,20 @@
+from __future__ import annotations
 
+from typing import Any
+
+import discord
+
+import metrics
+
+FOLLOWUP_SECONDS = metrics.histogram(
+    "geolive_followup_send_seconds", "Time to send an interaction followup.", ["command"]
+)
+
+
+async def followup(interaction: discord.Interaction, *args: Any, **kwargs: Any) -> None:
+    """
+    ``interaction.followup.send`` with its latency recorded per command.
+    """
+    command = interaction.command.qualified_name if interaction.command else "unknown"
+    with FOLLOWUP_SECONDS.time(command=command):
+        await interaction.followup.send(*args, **kwargs)
@@ -1,46 +1,158 @@
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, List
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from api_clients import usgs
+from api_clients.locations import resolve_location
+from cogs.commands import followup
 from embeds.geolive import geo_card
 from embeds.style import thin
-from graphing.heatmap import world_heatmap
+from feeds.leader import UPSTREAM_LEASE
+from feeds.quake_index import QuakeIndex
+from feeds.shared import QUAKE_INDEX, get_shared_log
+from graphing.output import png_stream
+from graphing.render_service import RenderError
+
+log = logging.getLogger(__name__)
+
+# (feed url, refresh period in seconds); longer windows change less often.
+QUAKE_WINDOWS = (
+    (usgs.USGS_DAY_FEED, 60),
+    (usgs.USGS_WEEK_FEED, 15 * 60),
+    (usgs.USGS_MONTH_FEED, 60 * 60),
+)
+MONTH_MS = 30 * 24 * 3600 * 1000
+QUAKE_HEATMAP = "graphing.heatmap:world_heatmap"
+
+
+def _time_text(ts: int | None) -> str:
+    if not ts:
+        return "N/A"
+    return dt.datetime.utcfromtimestamp(ts / 1000).strftime("%Y-%m-%d %H:%M UTC")
 
 
 class Disaster(commands.GroupCog, name="disaster"):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        self.index = QuakeIndex()
+        # The index doubles as the windows' seen-set: each window fetches
+        # conditionally and only what differs from the index becomes a delta.
+        # Standbys keep their index current from the shared log, so whoever
+        # takes over polling starts warm instead of re-downloading every window.
+        self._windows = [(usgs.QuakeFeed(url, state_path=None), period) for url, period in QUAKE_WINDOWS]
+        self._last_refresh = [0.0] * len(self._windows)
+        # Workers fill the index from what the coordinator published.
+        self.role = bot.settings.bot_role  # type: ignore[attr-defined]
+        self._shared_seq = 0
+        self._polling = False
+        self.refresh_index.start()
+
+    def cog_unload(self) -> None:
+        self.refresh_index.cancel()
+
+    @tasks.loop(seconds=60)
+    async def refresh_index(self) -> None:
+        now = time.time()
+        polling = self.role != "worker" and self.bot.is_leader(UPSTREAM_LEASE)  # type: ignore[attr-defined]
+        if not self._polling and self.role != "standalone":
+            # A new leader catches up on the log once more before its first poll.
+            try:
+                await self._follow()
+                if polling:
+                    await self._restore_validators()
+            except sqlite3.Error as exc:
+                # e.g. "database is locked"; the next run resumes from the cursor.
+                log.warning("Could not read the shared quake index: %s", exc)
+                return
+        self._polling = polling
+        if polling:
+            await self._poll_windows(now)
+        self.index.prune(int(now * 1000) - MONTH_MS)
+
+    async def _follow(self) -> None:
+        shared = get_shared_log()
+        while True:
+            self._shared_seq, deltas = await asyncio.to_thread(shared.read, QUAKE_INDEX, self._shared_seq)
+            if not deltas:
+                return
+            self.index.upsert_many(deltas)
+
+    async def _restore_validators(self) -> None:
+        shared = get_shared_log()
+        for feed, _ in self._windows:
+            validators = await asyncio.to_thread(shared.load_state, f"{QUAKE_INDEX}:{feed.url}")
+            if validators:
+                feed.validators = validators
+
+    async def _poll_windows(self, now: float) -> None:
+        client = self.bot.http_clients.get("usgs")  # type: ignore[attr-defined]
+        horizon = int(now * 1000) - MONTH_MS
+        for i, (feed, period) in enumerate(self._windows):
+            if now - self._last_refresh[i] < period:
+                continue
+            try:
+                quakes = await feed.fetch(client=client)
+            except Exception as exc:
+                log.warning("Quake index refresh failed for %s: %s", feed.url, exc)
+                continue
+            self._last_refresh[i] = now
+            if quakes is None:
+                continue
+            # Events past the horizon were pruned; they are not new again.
+            deltas = self.index.changes(quake for quake in quakes if (quake.get("time") or 0) >= horizon)
+            self.index.upsert_many(deltas)
+            if self.role == "coordinator":
+                try:
+                    await self._publish(feed, deltas, now)
+                except sqlite3.Error as exc:
+                    log.warning("Could not publish quake index deltas: %s", exc)
+
+    async def _publish(self, feed: usgs.QuakeFeed, deltas: List[Dict[str, Any]], now: float) -> None:
+        shared = get_shared_log()
+        if deltas:
+            await asyncio.to_thread(shared.prune, QUAKE_INDEX, now - MONTH_MS / 1000)
+            await asyncio.to_thread(shared.publish, QUAKE_INDEX, deltas)
+        # Stored after the deltas, so a successor that reads the log has seen
+        # everything these validators vouch for.
+        await asyncio.to_thread(shared.save_state, f"{QUAKE_INDEX}:{feed.url}", feed.validators)
 
     @app_commands.command(name="quake", description="Show the latest earthquakes.")
     async def quake(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer()
 
         try:
-            quakes = await usgs.fetch_recent_earthquakes()
+            quakes = await usgs.fetch_recent_earthquakes(
+                client=self.bot.http_clients.get("usgs")  # type: ignore[attr-defined]
+            )
         except Exception as exc:
-            await interaction.followup.send(f"Could not load USGS data: {exc}", ephemeral=True)
+            await followup(interaction, f"Could not load USGS data: {exc}", ephemeral=True)
             return
 
-        if not quakes:
-            await interaction.followup.send("No recent earthquakes found.", ephemeral=True)
+        if not len(quakes):
+            await followup(interaction, "No recent earthquakes found.", ephemeral=True)
             return
 
-        top = quakes[0]
-        ts = top.get("time")
-        time_text = (
-            dt.datetime.utcfromtimestamp(ts / 1000).strftime("%Y-%m-%d %H:%M UTC")
-            if ts
-            else "N/A"
-        )
+        latest = quakes.sort("time")
+        top = latest.record(0)
+        time_text = _time_text(top.get("time"))
 
-        points = [{"lat": q.get("lat"), "lon": q.get("lon"), "value": q.get("magnitude", 0)} for q in quakes[:20]]
-        heatmap_path = world_heatmap(points, "Latest Earthquakes")
-        file = discord.File(heatmap_path, filename=heatmap_path.name)
+        try:
+            png = await self.bot.renderer.render_cached(  # type: ignore[attr-defined]
+                QUAKE_HEATMAP, latest[:20], "Latest Earthquakes"
+            )
+        except RenderError as exc:
+            await followup(interaction, f"Could not render heatmap: {exc}", ephemeral=True)
+            return
+        file = discord.File(png_stream(png), filename="heatmap.png")
 
         embed = geo_card("GeoLive Earthquake Report")
         embed.add_field(name="📍 Location", value=top.get("place", "Unknown"), inline=False)
@@ -50,17 +162,88 @@ class Disaster(commands.GroupCog, name="disaster"):
         embed.add_field(name="🌐 Latitude", value=str(top.get("lat")), inline=True)
         embed.add_field(name="🌍 Longitude", value=str(top.get("lon")), inline=True)
         embed.add_field(name="────────────────────────", value=thin("Heatmap of latest events"), inline=False)
-        embed.set_image(url=f"attachment://{heatmap_path.name}")
+        embed.set_image(url="attachment://heatmap.png")
         embed.set_footer(text="Data source: USGS Earthquake Hazards Program")
 
-        for quake in quakes[:5]:
+        for quake in latest[:5].records():
             embed.add_field(
                 name=f"M {quake.get('magnitude', 'N/A')} | {quake.get('place', 'Unknown')}",
                 value=f"Lat: {quake.get('lat')} Lon: {quake.get('lon')} Depth: {quake.get('depth')} km",
                 inline=False,
             )
 
-        await interaction.followup.send(embed=embed, file=file)
+        await followup(interaction, embed=embed, file=file)
+
+    @app_commands.command(name="near", description="Find earthquakes from the past month near a location.")
+    @app_commands.describe(
+        location="City or place name",
+        radius="Search radius in km (default 500)",
+        min_mag="Minimum magnitude",
+    )
+    async def near(
+        self,
+        interaction: discord.Interaction,
+        location: str,
+        radius: app_commands.Range[int, 10, 5000] = 500,
+        min_mag: app_commands.Range[float, 0.0, 10.0] | None = None,
+    ) -> None:
+        await interaction.response.defer()
+
+        if not len(self.index):
+            await followup(interaction, "Earthquake data is still loading, try again shortly.", ephemeral=True)
+            return
+        try:
+            place = await resolve_location(
+                location,
+                client=self.bot.http_clients.get("weatherapi"),  # type: ignore[attr-defined]
+            )
+        except Exception as exc:
+            await followup(interaction, f"Could not resolve location: {exc}", ephemeral=True)
+            return
+        lat, lon = place.lat, place.lon
+
+        distances, hits = self.index.within(lat, lon, radius, min_mag=min_mag)
+        if len(hits):
+            nearest_distances, nearest = distances[:1], hits[:1]
+        else:
+            nearest_distances, nearest = self.index.nearest(lat, lon, min_mag=min_mag)
+
+        embed = geo_card("GeoLive Nearby Earthquakes")
+        embed.add_field(name="📍 Location", value=place.label, inline=False)
+        embed.add_field(name="📏 Radius", value=f"{radius} km", inline=True)
+        embed.add_field(name="🔢 Events", value=str(len(hits)), inline=True)
+        if min_mag is not None:
+            embed.add_field(name="🌡 Min. Magnitude", value=str(min_mag), inline=True)
+        if len(nearest):
+            distance, quake = nearest_distances[0], nearest.record(0)
+            embed.add_field(
+                name="────────────────────────",
+                value=thin("Nearest event"),
+                inline=False,
+            )
+            embed.add_field(
+                name=f"M {quake.get('magnitude', 'N/A')} | {quake.get('place', 'Unknown')}",
+                value=f"{distance:.0f} km away • Depth: {quake.get('depth')} km • {_time_text(quake.get('time'))}",
+                inline=False,
+            )
+        if len(hits) > 1:
+            embed.add_field(
+                name="────────────────────────",
+                value=thin(f"Within {radius} km"),
+                inline=False,
+            )
+            for distance, quake in zip(distances[1:6], hits[1:6].records()):
+                embed.add_field(
+                    name=f"M {quake.get('magnitude', 'N/A')} | {quake.get('place', 'Unknown')}",
+                    value=f"{distance:.0f} km away • {_time_text(quake.get('time'))}",
+                    inline=False,
+                )
+        embed.set_footer(text="Data source: USGS Earthquake Hazards Program")
+        await followup(interaction, embed=embed)
+
+    @refresh_index.before_loop
+    async def before_refresh_index(self) -> None:
+        await self.bot.wait_until_ready()
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -1,56 +1,116 @@
 from __future__ import annotations
 
 import datetime as dt
+import logging
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from api_clients import nasa, opennotify
+from cogs.commands import followup
 from embeds.geolive import geo_card
 from embeds.style import thin
+from feeds.leader import UPSTREAM_LEASE
+
+log = logging.getLogger(__name__)
+
+# DONKI issues a handful of notifications a day.
+DONKI_SYNC_SECONDS = 600
+
+
+def iss_embed(pos: dict) -> discord.Embed:
+    ts = pos.get("timestamp")
+    ts_text = dt.datetime.utcfromtimestamp(ts).strftime("%H:%M:%S UTC") if ts else "N/A"
+    embed = geo_card("GeoLive ISS Position")
+    embed.add_field(name="🌐 Latitude", value=str(pos.get("latitude")), inline=True)
+    embed.add_field(name="🌍 Longitude", value=str(pos.get("longitude")), inline=True)
+    embed.add_field(name="⏱ Time", value=ts_text, inline=True)
+    embed.add_field(name="────────────────────────", value=thin("Real-time ISS tracking"), inline=False)
+    embed.set_footer(text="Data source: Open Notify")
+    return embed
 
 
 class Space(commands.GroupCog, name="space"):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        # Workers read the notification store the upstream poller keeps current.
+        self.role = bot.settings.bot_role  # type: ignore[attr-defined]
+        self.sync_donki.start()
+
+    def cog_unload(self) -> None:
+        self.sync_donki.cancel()
+
+    @tasks.loop(seconds=DONKI_SYNC_SECONDS)
+    async def sync_donki(self) -> None:
+        if self.role == "worker" or not self.bot.is_leader(UPSTREAM_LEASE):  # type: ignore[attr-defined]
+            return
+        try:
+            added = await nasa.sync_notifications(
+                self.bot.settings.nasa_key,  # type: ignore[attr-defined]
+                client=self.bot.http_clients.get("nasa"),  # type: ignore[attr-defined]
+            )
+        except Exception as exc:
+            log.warning("DONKI sync failed: %s", exc)
+            return
+        if added:
+            log.info("Stored %d new DONKI notifications", added)
 
     @app_commands.command(name="aurora", description="Show current space weather alerts.")
-    async def aurora(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(
+        count="How many notifications to show (default 3)",
+        kind="Only this notification type",
+        days="Only notifications from the past N days",
+    )
+    @app_commands.choices(kind=[app_commands.Choice(name=kind, value=kind) for kind in nasa.MESSAGE_TYPES])
+    async def aurora(
+        self,
+        interaction: discord.Interaction,
+        count: app_commands.Range[int, 1, 10] = 3,
+        kind: str | None = None,
+        days: app_commands.Range[int, 1, 90] | None = None,
+    ) -> None:
         await interaction.response.defer()
 
+        since = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=days) if days else None
         try:
-            notifications = await nasa.fetch_space_weather(self.bot.settings.nasa_key)  # type: ignore[attr-defined]
+            notifications = await nasa.fetch_space_weather(
+                self.bot.settings.nasa_key,  # type: ignore[attr-defined]
+                count,
+                client=self.bot.http_clients.get("nasa"),  # type: ignore[attr-defined]
+                types=[kind] if kind else None,
+                since=since,
+            )
         except Exception as exc:
-            await interaction.followup.send(f"Could not load NASA data: {exc}", ephemeral=True)
+            await followup(interaction, f"Could not load NASA data: {exc}", ephemeral=True)
             return
 
-        description = "\n\n".join(nasa.format_notification(item) for item in notifications) or "No current alerts."
         embed = geo_card("GeoLive Space Weather")
         embed.add_field(name="────────────────────────", value=thin("Solar & Aurora activity"), inline=False)
-        embed.add_field(name="Alerts", value=description[:1000], inline=False)
+        if not notifications:
+            embed.add_field(name="Alerts", value="No current alerts.", inline=False)
+        for i, item in enumerate(notifications):
+            embed.add_field(name="Alerts" if i == 0 else "\u200b", value=nasa.format_notification(item)[:1024], inline=False)
         embed.set_footer(text="Data source: NASA DONKI")
-        await interaction.followup.send(embed=embed)
+        await followup(interaction, embed=embed)
 
     @app_commands.command(name="iss", description="Show the current ISS position.")
     async def iss(self, interaction: discord.Interaction) -> None:
         await interaction.response.defer()
 
         try:
-            pos = await opennotify.fetch_iss_position()
+            pos = await opennotify.fetch_iss_position(
+                client=self.bot.http_clients.get("opennotify")  # type: ignore[attr-defined]
+            )
         except Exception as exc:
-            await interaction.followup.send(f"Could not load ISS data: {exc}", ephemeral=True)
+            await followup(interaction, f"Could not load ISS data: {exc}", ephemeral=True)
             return
 
-        ts = pos.get("timestamp")
-        ts_text = dt.datetime.utcfromtimestamp(ts).strftime("%H:%M:%S UTC") if ts else "N/A"
-        embed = geo_card("GeoLive ISS Position")
-        embed.add_field(name="🌐 Latitude", value=str(pos.get("latitude")), inline=True)
-        embed.add_field(name="🌍 Longitude", value=str(pos.get("longitude")), inline=True)
-        embed.add_field(name="⏱ Time", value=ts_text, inline=True)
-        embed.add_field(name="────────────────────────", value=thin("Real-time ISS tracking"), inline=False)
-        embed.set_footer(text="Data source: Open Notify")
-        await interaction.followup.send(embed=embed)
+        await followup(interaction, embed=iss_embed(pos))
+
+    @sync_donki.before_loop
+    async def before_sync_donki(self) -> None:
+        await self.bot.wait_until_ready()
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -3,100 +3,139 @@ from __future__ import annotations
 import datetime as dt
 
 import discord
+import httpx
 from discord import app_commands
 from discord.ext import commands
 
 from api_clients import weatherapi
+from api_clients.locations import resolve_location
+from cogs.commands import followup
 from embeds.geolive import geo_card
 from embeds.style import thin
-from graphing.weather_graph import create_weather_graph
+from graphing.output import png_stream
+from graphing.render_service import RenderError
+
+# Rendered in the worker pool by path, so loading this cog never imports matplotlib.
+WEATHER_GRAPH = "graphing.weather_graph:create_weather_graph"
 
 
 def _is_valid_http(url: str | None) -> bool:
     return bool(url and (url.startswith("http://") or url.startswith("https://")))
 
 
+def current_weather_embed(current: dict) -> discord.Embed:
+    embed = geo_card("GeoLive Weather Report")
+    icon_url = current.get("icon")
+    if icon_url and icon_url.startswith("//"):
+        icon_url = f"https:{icon_url}"
+
+    embed.add_field(name="📍 Location", value=f"{current.get('city')}, {current.get('country')}", inline=False)
+    embed.add_field(name="🌡 Temperature", value=f"{current.get('temp_c')}°C", inline=True)
+    embed.add_field(name="💧 Humidity", value=f"{current.get('humidity')}%", inline=True)
+    embed.add_field(name="🌬 Wind", value=f"{current.get('wind_kph')} kph", inline=True)
+    embed.add_field(name="🌡 Dew Point", value=f"{current.get('dewpoint_c')}°C", inline=True)
+    embed.add_field(
+        name="────────────────────────",
+        value=thin("Current conditions"),
+        inline=False,
+    )
+    embed.add_field(name="Condition", value=current.get("condition", "N/A"), inline=False)
+
+    if _is_valid_http(icon_url):
+        embed.set_image(url=icon_url)
+
+    embed.set_footer(text="Data source: WeatherAPI.com")
+    return embed
+
+
 class Weather(commands.GroupCog, name="weather"):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
-    @app_commands.command(name="graph", description="Show temperature/dew point graph for today.")
-    async def graph(self, interaction: discord.Interaction, location: str) -> None:
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return self.bot.http_clients.get("weatherapi")  # type: ignore[attr-defined]
+
+    @app_commands.command(name="graph", description="Show temperature/dew point graph for today or the past days.")
+    @app_commands.describe(days="Number of days up to today (default 1)")
+    async def graph(
+        self,
+        interaction: discord.Interaction,
+        location: str,
+        days: app_commands.Range[int, 1, 30] = 1,
+    ) -> None:
         await interaction.response.defer()
 
+        today = dt.date.today()
         try:
-            today = dt.date.today().isoformat()
-            history = await weatherapi.get_weather_history(location, today)
+            place = await resolve_location(location, client=self._client)
+            history = await weatherapi.get_weather_history_range(
+                place.query, days, end=today, client=self._client
+            )
         except Exception as exc:
-            await interaction.followup.send(f"Could not load data: {exc}", ephemeral=True)
+            await followup(interaction, f"Could not load data: {exc}", ephemeral=True)
             return
 
-        graph_path = create_weather_graph(
-            history["times"],
-            history["temps"],
-            history["dewpoints"],
-            location.title(),
-        )
-        file = discord.File(graph_path, filename="graph.png")
+        try:
+            png = await self.bot.renderer.render(  # type: ignore[attr-defined]
+                WEATHER_GRAPH,
+                history["times"],
+                history["temps"],
+                history["dewpoints"],
+                place.name,
+            )
+        except RenderError as exc:
+            await followup(interaction, f"Could not render graph: {exc}", ephemeral=True)
+            return
+        file = discord.File(png_stream(png), filename="graph.png")
 
         embed = geo_card("GeoLive Weather Graph")
-        embed.add_field(name="📍 Location", value=location.title(), inline=False)
-        embed.add_field(name="📅 Date", value=str(today), inline=True)
+        embed.add_field(name="📍 Location", value=place.label, inline=False)
+        if days == 1:
+            date_text, caption = str(today), "Temperature / Dew Point today"
+        else:
+            start = today - dt.timedelta(days=days - 1)
+            date_text, caption = f"{start} – {today}", f"Temperature / Dew Point, last {days} days"
+        embed.add_field(name="📅 Date", value=date_text, inline=True)
+        missing = history["missing_days"]
+        if missing:
+            embed.add_field(name="⚠️ No data", value=f"{len(missing)} of {days} days unavailable", inline=True)
         embed.add_field(
             name="────────────────────────",
-            value=thin("Temperature / Dew Point today"),
+            value=thin(caption),
             inline=False,
         )
         embed.set_image(url="attachment://graph.png")
         embed.set_footer(text="Data source: WeatherAPI.com")
 
-        await interaction.followup.send(embed=embed, file=file)
+        await followup(interaction, embed=embed, file=file)
 
     @app_commands.command(name="now", description="Show current weather.")
     async def now(self, interaction: discord.Interaction, location: str) -> None:
         await interaction.response.defer()
 
         try:
-            current = await weatherapi.get_current_weather(location)
+            place = await resolve_location(location, client=self._client)
+            current = await weatherapi.get_current_weather(place.query, client=self._client)
         except Exception as exc:
-            await interaction.followup.send(f"Could not load data: {exc}", ephemeral=True)
+            await followup(interaction, f"Could not load data: {exc}", ephemeral=True)
             return
 
-        embed = geo_card("GeoLive Weather Report")
-        icon_url = current.get("icon")
-        if icon_url and icon_url.startswith("//"):
-            icon_url = f"https:{icon_url}"
-
-        embed.add_field(name="📍 Location", value=f"{current.get('city')}, {current.get('country')}", inline=False)
-        embed.add_field(name="🌡 Temperature", value=f"{current.get('temp_c')}°C", inline=True)
-        embed.add_field(name="💧 Humidity", value=f"{current.get('humidity')}%", inline=True)
-        embed.add_field(name="🌬 Wind", value=f"{current.get('wind_kph')} kph", inline=True)
-        embed.add_field(name="🌡 Dew Point", value=f"{current.get('dewpoint_c')}°C", inline=True)
-        embed.add_field(
-            name="────────────────────────",
-            value=thin("Current conditions"),
-            inline=False,
-        )
-        embed.add_field(name="Condition", value=current.get("condition", "N/A"), inline=False)
-
-        if _is_valid_http(icon_url):
-            embed.set_image(url=icon_url)
-
-        embed.set_footer(text="Data source: WeatherAPI.com")
-        await interaction.followup.send(embed=embed)
+        await followup(interaction, embed=current_weather_embed(current))
 
     @app_commands.command(name="forecast", description="Show 3-day forecast with UV and air quality.")
     async def forecast(self, interaction: discord.Interaction, location: str) -> None:
         await interaction.response.defer()
 
         try:
-            forecast = await weatherapi.get_forecast(location, days=3)
+            place = await resolve_location(location, client=self._client)
+            forecast = await weatherapi.get_forecast(place.query, days=3, client=self._client)
         except Exception as exc:
-            await interaction.followup.send(f"Could not load forecast: {exc}", ephemeral=True)
+            await followup(interaction, f"Could not load forecast: {exc}", ephemeral=True)
             return
 
         embed = geo_card("GeoLive Weather Forecast")
-        embed.add_field(name="📍 Location", value=location.title(), inline=False)
+        embed.add_field(name="📍 Location", value=place.label, inline=False)
         embed.add_field(
             name="────────────────────────",
             value=thin("3-day outlook with UV & AQI"),
@@ -123,7 +162,7 @@ class Weather(commands.GroupCog, name="weather"):
             )
 
         embed.set_footer(text="Data source: WeatherAPI.com")
-        await interaction.followup.send(embed=embed)
+        await followup(interaction, embed=embed)
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass
+from typing import List
 
 from dotenv import load_dotenv
 
@@ -14,7 +15,43 @@ class Settings:
     embed_icon_url: str = "YOUR_ICON_URL"
     colour: int = 0x00AEEF
     auto_feed_hours: int = 4
+    auto_feed_max_events: int = 3
+    auto_feed_concurrency: int = 8
     sentry_dsn: str | None = None
+    http_max_connections: int = 20
+    http_max_keepalive: int = 10
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+    render_workers: int = 1
+    render_max_pending: int = 16
+    render_timeout: float = 30.0
+    render_cache_entries: int = 128
+    response_cache_max_mb: int = 64
+    metrics_port: int = 8080
+    metrics_host: str = "127.0.0.1"
+    force_command_sync: bool = False
+    command_hash_path: str = "data/command_tree.sha256"
+    bot_role: str = "standalone"
+    shard_count: int | None = None
+    shard_ids: List[int] | None = None
+    leader_election: bool = False
+    leader_lease_seconds: float = 15.0
+
+
+BOT_ROLES = ("standalone", "coordinator", "worker")
+
+
+def parse_shard_ids(value: str) -> List[int] | None:
+    """
+    Parse shard ranges such as ``"0-3,8"`` into ``[0, 1, 2, 3, 8]``.
+    """
+    ids: List[int] = []
+    for part in value.replace(" ", "").split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return sorted(set(ids)) or None
 
 
 def load_settings() -> Settings:
@@ -27,8 +64,31 @@ def load_settings() -> Settings:
         nasa_key=os.getenv("NASA_KEY", "YOUR_NASA_KEY"),
         embed_icon_url=os.getenv("ICON_URL", "YOUR_ICON_URL"),
         sentry_dsn=os.getenv("SENTRY_DSN"),
+        http_max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+        http_max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "10")),
+        http_keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        auto_feed_concurrency=int(os.getenv("AUTO_FEED_CONCURRENCY", "8")),
+        http2=os.getenv("HTTP2", "").lower() in ("1", "true", "yes"),
+        render_workers=int(os.getenv("RENDER_WORKERS", "1")),
+        render_max_pending=int(os.getenv("RENDER_MAX_PENDING", "16")),
+        render_timeout=float(os.getenv("RENDER_TIMEOUT", "30")),
+        render_cache_entries=int(os.getenv("RENDER_CACHE_ENTRIES", "128")),
+        response_cache_max_mb=int(os.getenv("RESPONSE_CACHE_MAX_MB", "64")),
+        metrics_port=int(os.getenv("METRICS_PORT", os.getenv("PORT", "8080"))),
+        metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        force_command_sync=os.getenv("FORCE_COMMAND_SYNC", "").lower() in ("1", "true", "yes"),
+        command_hash_path=os.getenv("COMMAND_HASH_PATH", "data/command_tree.sha256"),
+        bot_role=os.getenv("BOT_ROLE", "standalone").lower(),
+        shard_count=int(os.environ["SHARD_COUNT"]) if os.getenv("SHARD_COUNT") else None,
+        shard_ids=parse_shard_ids(os.getenv("SHARD_IDS", "")),
+        leader_election=os.getenv("LEADER_ELECTION", "").lower() in ("1", "true", "yes"),
+        leader_lease_seconds=float(os.getenv("LEADER_LEASE_SECONDS", "15")),
     )
 
 
-# Convenience constant for embed styling
-ICON_URL = load_settings().embed_icon_url
+def __getattr__(name: str):
+    # ICON_URL is resolved on first access rather than at import time.
+    if name == "ICON_URL":
+        value = globals()["ICON_URL"] = load_settings().embed_icon_url
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import os
-from flask import Flask, render_template, send_from_directory
+import time
+
+from flask import Flask, Response, g, render_template, request, send_from_directory
 from dotenv import load_dotenv
 
 from dashboard.routes.auth import auth_bp
 from dashboard.routes.main import main_bp
+from dashboard.utils import metrics
+
+REQUEST_SECONDS = metrics.histogram(
+    "geolive_dashboard_request_seconds", "Dashboard request latency.", ["endpoint", "status"]
+)
 
 
 def create_app() -> Flask:
@@ -23,6 +30,25 @@ def create_app() -> Flask:
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
 
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or "unmatched",
+                status=str(response.status_code),
+            )
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
     @app.route("/")
     def home():
         return render_template("login.html")
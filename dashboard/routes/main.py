@@ -37,6 +37,8 @@ def guild_settings(guild_id: str):
 @main_bp.route("/guild/<guild_id>/save", methods=["POST"])
 def guild_save(guild_id: str):
     data: Dict[str, Any] = request.get_json(force=True) or {}
+    # Merge so settings not present in the form survive a save.
+    data = {**get_guild_config(guild_id), **data}
     save_guild_config(guild_id, data)
     return jsonify({"success": True, "config": data})
 
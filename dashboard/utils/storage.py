@@ -1,27 +1,25 @@
 from __future__ import annotations
 
 import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator, List, Set
 
 DATA_DIR = Path("data/config")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
+DB_PATH = Path("data/geolive.db")
 
+# How stale the module-level readers (the dashboard) may serve a config another process wrote.
+REFRESH_SECONDS = 1.0
 
-def get_guild_config(guild_id: str) -> Dict[str, Any]:
-    path = DATA_DIR / f"{guild_id}.json"
-    if not path.exists():
-        return default_config()
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return default_config()
-
+# Feed toggles mirrored into indexed columns for batch queries.
+FLAG_COLUMNS = ("earthquake_feed_enabled", "weather_feed_enabled", "iss_feed_enabled")
 
-def save_guild_config(guild_id: str, data: Dict[str, Any]) -> None:
-    path = DATA_DIR / f"{guild_id}.json"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+log = logging.getLogger(__name__)
 
 
 def default_config() -> Dict[str, Any]:
@@ -30,9 +28,196 @@ def default_config() -> Dict[str, Any]:
         "weather_feed_enabled": True,
         "iss_feed_enabled": False,
         "interval": 4,
+        "weather_location": "",
+        "watch_regions": [],
         "primary_color": "#00AEEF",
         "icon_url": "",
         "banner_url": "",
         "weather_api_key": "",
         "nasa_key": "",
     }
+
+
+class GuildConfigStore:
+    """
+    Guild configs in SQLite (WAL) with an in-process read-through cache.
+
+    The bot and the dashboard may both open the same database; ``refresh``
+    picks up rows another process wrote since the last call. Each write gets
+    the next ``version`` inside its write transaction, so versions commit in
+    order and a cursor on them never skips a row.
+    """
+
+    def __init__(self, path: Path = DB_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._loaded_all = False
+        self._seen_version = 0
+        self._refreshed_at = float("-inf")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        flags = ", ".join(f"{col} INTEGER NOT NULL" for col in FLAG_COLUMNS)
+        with self._lock:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS guild_config ("
+                f"guild_id TEXT PRIMARY KEY, data TEXT NOT NULL, {flags}, updated_at REAL NOT NULL, "
+                f"version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(guild_config)")}
+            if "version" not in columns:
+                # Databases created before the version column: number existing rows in insertion order.
+                self._conn.execute("ALTER TABLE guild_config ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE guild_config SET version = rowid")
+            for col in FLAG_COLUMNS:
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_guild_config_{col} ON guild_config ({col})")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_guild_config_version ON guild_config (version)")
+
+    def load_all(self) -> int:
+        """
+        Bulk-load every stored config into the cache; returns the row count.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT guild_id, data, version FROM guild_config").fetchall()
+        for guild_id, data, version in rows:
+            self._cache[guild_id] = json.loads(data)
+            self._seen_version = max(self._seen_version, version)
+        self._loaded_all = True
+        return len(rows)
+
+    def get(self, guild_id: str) -> Dict[str, Any]:
+        cfg = self._cache.get(guild_id)
+        if cfg is None and not self._loaded_all:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM guild_config WHERE guild_id = ?", (guild_id,)
+                ).fetchone()
+            if row is not None:
+                cfg = self._cache[guild_id] = json.loads(row[0])
+        return dict(cfg) if cfg is not None else default_config()
+
+    def save(self, guild_id: str, data: Dict[str, Any]) -> None:
+        self.save_many({guild_id: data})
+
+    def save_many(self, configs: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Write several configs in one transaction.
+        """
+        defaults = default_config()
+        placeholders = ", ".join("?" * (len(FLAG_COLUMNS) + 4))
+        with self._lock:
+            with self._transaction():
+                # Under BEGIN IMMEDIATE no other writer can take or commit a later version first.
+                version = self._conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM guild_config").fetchone()[0]
+                now = time.time()
+                rows = [
+                    (
+                        guild_id,
+                        json.dumps(data),
+                        *(int(bool(data.get(col, defaults[col]))) for col in FLAG_COLUMNS),
+                        now,
+                        version,
+                    )
+                    for guild_id, data in configs.items()
+                ]
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO guild_config "
+                    f"(guild_id, data, {', '.join(FLAG_COLUMNS)}, updated_at, version) VALUES ({placeholders})",
+                    rows,
+                )
+        for guild_id, data in configs.items():
+            self._cache[guild_id] = dict(data)
+
+    def guilds_with(self, flag: str, enabled: bool = True) -> List[str]:
+        """
+        Ids of stored guilds whose feed toggle ``flag`` equals ``enabled``.
+        """
+        if flag not in FLAG_COLUMNS:
+            raise ValueError(f"Unknown feed flag: {flag}")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT guild_id FROM guild_config WHERE {flag} = ?", (int(enabled),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def refresh(self, *, max_age: float = 0.0) -> Set[str]:
+        """
+        Reload rows changed by other processes; returns the changed guild ids.
+
+        With ``max_age``, skips the query if the last refresh was more recent.
+        """
+        now = time.monotonic()
+        if now - self._refreshed_at < max_age:
+            return set()
+        self._refreshed_at = now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT guild_id, data, version FROM guild_config WHERE version > ?",
+                (self._seen_version,),
+            ).fetchall()
+        for guild_id, data, version in rows:
+            self._cache[guild_id] = json.loads(data)
+            self._seen_version = max(self._seen_version, version)
+        return {row[0] for row in rows}
+
+    def migrate_json(self, directory: Path = DATA_DIR) -> int:
+        """
+        Import legacy ``<guild_id>.json`` files that are not in the database yet.
+        """
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT guild_id FROM guild_config")}
+        pending: Dict[str, Dict[str, Any]] = {}
+        for path in directory.glob("*.json"):
+            if path.stem in known:
+                continue
+            try:
+                pending[path.stem] = json.loads(path.read_text(encoding="utf-8"))
+            except Exception as exc:
+                log.warning("Skipping unreadable guild config %s: %s", path, exc)
+        if pending:
+            self.save_many(pending)
+            log.info("Migrated %d guild config(s) from %s", len(pending), directory)
+        return len(pending)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+
+_store: GuildConfigStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> GuildConfigStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = GuildConfigStore()
+            _store.migrate_json()
+        return _store
+
+
+def get_guild_config(guild_id: str) -> Dict[str, Any]:
+    store = get_store()
+    store.refresh(max_age=REFRESH_SECONDS)
+    return store.get(guild_id)
+
+
+def save_guild_config(guild_id: str, data: Dict[str, Any]) -> None:
+    get_store().save(guild_id, data)
+
+
+def get_guild_configs(guild_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    store = get_store()
+    store.refresh(max_age=REFRESH_SECONDS)
+    return {guild_id: store.get(guild_id) for guild_id in guild_ids}
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import discord
 
-from config import ICON_URL
+import config
 from embeds.style import thin
 
 
@@ -11,12 +11,18 @@ def _is_valid_http(url: str | None) -> bool:
 
 
 def geo_card(title: str, description: str | None = None, *, color: int | None = None, icon_url: str | None = None) -> discord.Embed:
-    embed = discord.Embed(
-        title=f"🌐 {thin(title)}",
-        description=description,
-        color=color or 0x00AEEF,
-    )
-    icon = icon_url or ICON_URL
+    embed = discord.Embed(title=f"🌐 {thin(title)}", description=description)
+    return apply_branding(embed, color=color, icon_url=icon_url)
+
+
+def apply_branding(embed: discord.Embed, *, color: int | None = None, icon_url: str | None = None) -> discord.Embed:
+    """
+    Apply a guild's colour and thumbnail icon, falling back to the GeoLive defaults.
+    """
+    embed.colour = color or 0x00AEEF
+    icon = icon_url or config.ICON_URL
     if _is_valid_http(icon):
         embed.set_thumbnail(url=icon)
+    else:
+        embed.set_thumbnail(url=None)
     return embed
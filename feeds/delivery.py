@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+import discord
+
+import metrics
+
+log = logging.getLogger(__name__)
+
+# Discord allows 50 requests/s per bot globally and 5 messages per 5s per channel.
+# Stay under the global bucket so interactive commands keep headroom.
+GLOBAL_RATE = (45, 1.0)
+CHANNEL_RATE = (5, 5.0)
+
+SENDS = metrics.counter("geolive_feed_sends_total", "Feed messages by delivery outcome.", ["outcome"])
+SEND_SECONDS = metrics.histogram("geolive_feed_send_seconds", "Time to send one feed message.")
+
+
+class TokenBucket:
+    def __init__(self, rate: int, per: float) -> None:
+        self.capacity = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.capacity / self.per)
+        self._updated = now
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return self._tokens >= self.capacity
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.per / self.capacity)
+
+
+@dataclass(order=True)
+class DeliveryJob:
+    priority: float
+    seq: int
+    guild_id: int = field(compare=False)
+    channel: discord.abc.GuildChannel = field(compare=False)
+    send: Callable[[discord.abc.GuildChannel], Awaitable[None]] = field(compare=False)
+
+
+@dataclass
+class DeliveryReport:
+    queued: int = 0
+    sent: int = 0
+    failed: int = 0
+    forbidden_guilds: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.sent}/{self.queued} sent, {self.failed} failed, "
+            f"{len(self.forbidden_guilds)} forbidden in {self.elapsed:.1f}s "
+            f"({self.throughput:.1f} msg/s)"
+        )
+
+
+class DeliveryEngine:
+    """
+    Sends feed messages with bounded concurrency under Discord's rate limits.
+
+    Jobs are drained highest-severity first (lowest ``priority``), each send
+    waits on the global bucket and its channel's bucket, and a slow channel
+    only occupies one worker instead of blocking the whole tick.
+    """
+
+    def __init__(self, *, concurrency: int = 8) -> None:
+        self.concurrency = concurrency
+        self._global = TokenBucket(*GLOBAL_RATE)
+        self._channels: Dict[int, TokenBucket] = {}
+        self._seq = itertools.count()
+
+    def job(
+        self,
+        severity: float,
+        channel: discord.abc.GuildChannel,
+        send: Callable[[discord.abc.GuildChannel], Awaitable[None]],
+    ) -> DeliveryJob:
+        return DeliveryJob(-severity, next(self._seq), channel.guild.id, channel, send)
+
+    async def deliver(self, jobs: Iterable[DeliveryJob]) -> DeliveryReport:
+        report = DeliveryReport()
+        queue: "asyncio.PriorityQueue[DeliveryJob]" = asyncio.PriorityQueue()
+        for job in jobs:
+            queue.put_nowait(job)
+        report.queued = queue.qsize()
+        self._prune_buckets()
+
+        started = time.monotonic()
+        workers = [
+            asyncio.create_task(self._worker(queue, report))
+            for _ in range(min(self.concurrency, report.queued))
+        ]
+        await asyncio.gather(*workers)
+        report.elapsed = time.monotonic() - started
+        return report
+
+    async def _worker(self, queue: "asyncio.PriorityQueue[DeliveryJob]", report: DeliveryReport) -> None:
+        while not queue.empty():
+            job = queue.get_nowait()
+            bucket = self._channels.setdefault(job.channel.id, TokenBucket(*CHANNEL_RATE))
+            await bucket.acquire()
+            await self._global.acquire()
+            started = time.monotonic()
+            try:
+                await job.send(job.channel)
+                report.sent += 1
+                SENDS.inc(outcome="sent")
+            except discord.Forbidden:
+                report.failed += 1
+                report.forbidden_guilds.append(job.guild_id)
+                SENDS.inc(outcome="forbidden")
+            except Exception as exc:
+                report.failed += 1
+                SENDS.inc(outcome="failed")
+                log.error("Feed delivery failed in %s: %s", job.channel, exc)
+            SEND_SECONDS.observe(time.monotonic() - started)
+
+    def _prune_buckets(self) -> None:
+        for channel_id in [cid for cid, bucket in self._channels.items() if bucket.idle]:
+            del self._channels[channel_id]
+
+
+class FeedChannelCache:
+    """
+    Remembers the channel each guild's feed goes to, so it is resolved once.
+    """
+
+    def __init__(self) -> None:
+        self._by_guild: Dict[int, int] = {}
+
+    def get(self, guild: discord.Guild) -> discord.TextChannel | None:
+        channel_id = self._by_guild.get(guild.id)
+        if channel_id is not None:
+            channel = guild.get_channel(channel_id)
+            if isinstance(channel, discord.TextChannel):
+                return channel
+        channel = self._resolve(guild)
+        if channel is None:
+            self._by_guild.pop(guild.id, None)
+        else:
+            self._by_guild[guild.id] = channel.id
+        return channel
+
+    def invalidate(self, guild_id: int) -> None:
+        self._by_guild.pop(guild_id, None)
+
+    @staticmethod
+    def _resolve(guild: discord.Guild) -> discord.TextChannel | None:
+        for channel in guild.text_channels:
+            if channel.permissions_for(guild.me).send_messages:  # type: ignore[arg-type]
+                return channel
+        return None
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict
+
+import metrics
+from feeds.shared import DB_PATH
+
+log = logging.getLogger(__name__)
+
+# Lease names: who polls the upstreams, and who delivers feeds for a shard range.
+UPSTREAM_LEASE = "upstream"
+AUTO_FEED_LEASE = "auto_feed"
+
+_keepers: Dict[str, "LeaseKeeper"] = {}
+
+
+class Lease:
+    """
+    A named, expiring lock row in SQLite shared by every replica.
+
+    ``acquire`` takes the lease if it is free, expired or already ours, and
+    pushes its expiry ``ttl`` seconds out; the token increments on every
+    change of holder so a stale leader can be told apart from the current one.
+    """
+
+    def __init__(self, name: str, holder: str, *, ttl: float, path: Path = DB_PATH) -> None:
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=ttl / 3)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS lease ("
+                "name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL, token INTEGER NOT NULL)"
+            )
+        self.token = 0
+
+    def acquire(self) -> float | None:
+        """
+        Take or renew the lease; returns its new expiry, or None if another holder has it.
+        """
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT holder, expires_at, token FROM lease WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is None:
+                    token = 1
+                    self._conn.execute(
+                        "INSERT INTO lease (name, holder, expires_at, token) VALUES (?, ?, ?, ?)",
+                        (self.name, self.holder, expires_at, token),
+                    )
+                elif row[0] == self.holder or row[1] <= now:
+                    token = row[2] if row[0] == self.holder else row[2] + 1
+                    self._conn.execute(
+                        "UPDATE lease SET holder = ?, expires_at = ?, token = ? WHERE name = ?",
+                        (self.holder, expires_at, token, self.name),
+                    )
+                else:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.token = token
+        return expires_at
+
+    def release(self) -> None:
+        with self._lock:
+            # Expire rather than delete, so the next holder's token still increments.
+            self._conn.execute("UPDATE lease SET expires_at = 0 WHERE name = ? AND holder = ?", (self.name, self.holder))
+
+
+class LeaseKeeper:
+    """
+    Keeps trying to hold a lease and renews it every ``ttl / 3`` seconds.
+
+    ``held`` turns false as soon as the lease could have expired, even if the
+    heartbeat is stuck, so a stalled leader stops acting before a standby
+    takes over. Releasing on shutdown lets a standby take over on its next
+    heartbeat instead of waiting out the ttl.
+    """
+
+    def __init__(self, name: str, *, ttl: float = 15.0, path: Path = DB_PATH, holder: str | None = None) -> None:
+        self.name = name
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lease = Lease(name, self.holder, ttl=ttl, path=path)
+        self._expires_at = 0.0
+        self._task: asyncio.Task | None = None
+        _keepers[name] = self
+
+    @property
+    def held(self) -> bool:
+        return time.time() < self._expires_at
+
+    async def start(self) -> None:
+        """
+        Make the first attempt before returning, so the caller knows its role immediately.
+        """
+        await self._beat()
+        if self._task is None:
+            self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+        if self.held:
+            self._expires_at = 0.0
+            await asyncio.to_thread(self._lease.release)
+            log.info("Released lease %s", self.name)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self._lease.ttl / 3)
+            await self._beat()
+
+    async def _beat(self) -> None:
+        was_held = self.held
+        try:
+            expires_at = await asyncio.to_thread(self._lease.acquire)
+        except sqlite3.Error as exc:
+            log.warning("Lease %s heartbeat failed: %s", self.name, exc)
+            return
+        self._expires_at = expires_at or 0.0
+        if self.held and not was_held:
+            log.info("Acquired lease %s as %s (token %d)", self.name, self.holder, self._lease.token)
+        elif was_held and not self.held:
+            log.warning("Lost lease %s", self.name)
+
+
+metrics.gauge(
+    "geolive_lease_held",
+    "Whether this process holds the named lease.",
+    ["lease"],
+    callback=lambda: {(name,): float(keeper.held) for name, keeper in _keepers.items()},
+)
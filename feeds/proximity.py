@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Sequence, Set
+
+import numpy as np
+
+from feeds.quake_index import EARTH_RADIUS_KM
+
+Quake = Dict[str, Any]
+
+
+def parse_regions(config: Mapping[str, Any]) -> List[tuple]:
+    """
+    Valid ``(lat, lon, radius_km, min_magnitude)`` tuples from a guild config.
+    """
+    regions = []
+    for raw in config.get("watch_regions") or []:
+        try:
+            lat, lon = float(raw["lat"]), float(raw["lon"])
+            radius = float(raw.get("radius_km", 500))
+            min_mag = float(raw.get("min_magnitude", 0))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if -90 <= lat <= 90 and -180 <= lon <= 180 and radius > 0:
+            regions.append((lat, lon, radius, min_mag))
+    return regions
+
+
+class WatchRegions:
+    """
+    All guilds' watch regions packed into NumPy arrays for batch matching.
+
+    ``match`` evaluates one vectorized haversine over every region x event
+    pair, so matching cost does not grow with Python-level loops over guilds.
+    """
+
+    def __init__(self) -> None:
+        self._by_guild: Dict[int, List[tuple]] = {}
+        self._dirty = True
+        self._guild_ids = np.empty(0, dtype=np.int64)
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._cos_lat = np.empty(0)
+        self._radius = np.empty(0)
+        self._min_mag = np.empty(0)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._by_guild
+
+    def __len__(self) -> int:
+        return sum(len(regions) for regions in self._by_guild.values())
+
+    def update(self, guild_id: int, config: Mapping[str, Any]) -> None:
+        regions = parse_regions(config)
+        if regions:
+            self._by_guild[guild_id] = regions
+        else:
+            self._by_guild.pop(guild_id, None)
+        self._dirty = True
+
+    def remove(self, guild_id: int) -> None:
+        if self._by_guild.pop(guild_id, None) is not None:
+            self._dirty = True
+
+    def _rebuild(self) -> None:
+        rows = [(gid, *region) for gid, regions in self._by_guild.items() for region in regions]
+        table = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, 4)
+        self._guild_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._lat = np.radians(table[:, 0])
+        self._lon = np.radians(table[:, 1])
+        self._cos_lat = np.cos(self._lat)
+        self._radius = table[:, 2]
+        self._min_mag = table[:, 3]
+        self._dirty = False
+
+    def match(self, events: Sequence[Quake]) -> List[Set[int]]:
+        """
+        For each event, the ids of guilds with at least one region containing it.
+        """
+        if self._dirty:
+            self._rebuild()
+        matches: List[Set[int]] = [set() for _ in events]
+        if not len(self._guild_ids) or not events:
+            return matches
+
+        ev_lat = np.radians(np.array([q["lat"] for q in events], dtype=np.float64))
+        ev_lon = np.radians(np.array([q["lon"] for q in events], dtype=np.float64))
+        ev_mag = np.array([_magnitude(q) for q in events], dtype=np.float64)
+
+        # regions on axis 0, events on axis 1
+        dlat = ev_lat[None, :] - self._lat[:, None]
+        dlon = ev_lon[None, :] - self._lon[:, None]
+        a = np.sin(dlat / 2) ** 2 + self._cos_lat[:, None] * np.cos(ev_lat)[None, :] * np.sin(dlon / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        hit = (distance <= self._radius[:, None]) & (ev_mag[None, :] >= self._min_mag[:, None])
+
+        region_idx, event_idx = np.nonzero(hit)
+        for guild_id, event in zip(self._guild_ids[region_idx].tolist(), event_idx.tolist()):
+            matches[event].add(guild_id)
+        return matches
+
+
+def _magnitude(quake: Quake) -> float:
+    mag = quake.get("magnitude")
+    return float(mag) if isinstance(mag, (int, float)) else float("-inf")
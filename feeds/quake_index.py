@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from api_clients.quake_batch import QuakeBatch
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.195
+
+# Compact once tombstoned rows outnumber live ones, and there are at least this many.
+COMPACT_MIN_DEAD = 1024
+
+Quake = Dict[str, Any]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _haversine_km_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    phi1, phi2 = math.radians(lat), np.radians(lats)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+class QuakeIndex:
+    """
+    Quake events held as ``QuakeBatch`` columns, keyed by USGS event id.
+
+    A month of global events takes tens of bytes each instead of a dict per
+    event. Radius queries prefilter on a lat/lon box and run one vectorised
+    haversine over what is left, so lookups stay well under a millisecond.
+    ``upsert_many`` appends rows and tombstones the ones they revise; the
+    columns are compacted once dead rows outnumber live ones. Queries return
+    batches too; callers turn the few rows they show into dicts.
+    """
+
+    def __init__(self) -> None:
+        self._batch = QuakeBatch.empty()
+        self._alive = np.zeros(0, dtype=bool)
+        # event id -> row in the columns, live rows only
+        self._rows: Dict[str, int] = {}
+        self._place_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the columns, tombstones included.
+        """
+        return self._batch.nbytes + self._alive.nbytes
+
+    def upsert(self, quake: Quake) -> None:
+        self.upsert_many([quake])
+
+    def upsert_many(self, quakes: Iterable[Quake]) -> int:
+        """
+        Add or replace events in one append; returns how many were stored.
+        """
+        latest: Dict[str, Quake] = {}
+        for quake in quakes:
+            event_id = quake.get("id")
+            if event_id and quake.get("lat") is not None and quake.get("lon") is not None:
+                latest[event_id] = quake
+        if not latest:
+            return 0
+        for event_id in latest:
+            self.remove(event_id)
+        start = len(self._batch)
+        self._append(QuakeBatch.from_records(latest.values()))
+        for offset, event_id in enumerate(latest):
+            self._rows[event_id] = start + offset
+        dead = len(self._alive) - len(self._rows)
+        if dead >= COMPACT_MIN_DEAD and dead > len(self._rows):
+            self._compact()
+        return len(latest)
+
+    def changes(self, quakes: Iterable[Quake]) -> List[Quake]:
+        """
+        Quakes that are new to the index or revised to another magnitude,
+        tagged like ``QuakeFeed.poll`` deltas: ``change="new"``, or
+        ``change="updated"`` with ``previous_magnitude``.
+        """
+        batch = self._batch
+        deltas: List[Quake] = []
+        for quake in quakes:
+            event_id = quake.get("id")
+            if not event_id or quake.get("lat") is None or quake.get("lon") is None:
+                continue
+            row = self._rows.get(event_id)
+            if row is None:
+                deltas.append({**quake, "change": "new"})
+                continue
+            previous = float(batch.magnitude[row])
+            previous_magnitude = None if previous != previous else round(previous, 3)
+            if (quake.get("updated") or 0) > int(batch.updated[row]) and not _same_magnitude(
+                quake.get("magnitude"), previous_magnitude
+            ):
+                deltas.append({**quake, "change": "updated", "previous_magnitude": previous_magnitude})
+        return deltas
+
+    def remove(self, event_id: str) -> None:
+        row = self._rows.pop(event_id, None)
+        if row is not None:
+            self._alive[row] = False
+
+    def prune(self, older_than_ms: int) -> int:
+        """
+        Drop events whose origin time is before ``older_than_ms`` (epoch ms).
+        """
+        stale = np.flatnonzero(self._alive & (self._batch.time < older_than_ms))
+        if not len(stale):
+            return 0
+        self._alive[stale] = False
+        stale_rows = set(stale.tolist())
+        self._rows = {event_id: row for event_id, row in self._rows.items() if row not in stale_rows}
+        return len(stale)
+
+    def _append(self, added: QuakeBatch) -> None:
+        # Re-code the new rows' places against the index's own table.
+        codes = np.array(
+            [self._place_codes.setdefault(place, len(self._place_codes)) for place in added.places], dtype=np.int32
+        )
+        batch = self._batch
+        self._batch = QuakeBatch(
+            ids=np.concatenate([batch.ids, added.ids]),
+            lat=np.concatenate([batch.lat, added.lat]),
+            lon=np.concatenate([batch.lon, added.lon]),
+            depth=np.concatenate([batch.depth, added.depth]),
+            magnitude=np.concatenate([batch.magnitude, added.magnitude]),
+            time=np.concatenate([batch.time, added.time]),
+            updated=np.concatenate([batch.updated, added.updated]),
+            place_index=np.concatenate([batch.place_index, codes[added.place_index]]),
+            places=list(self._place_codes),
+        )
+        self._alive = np.concatenate([self._alive, np.ones(len(added), dtype=bool)])
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive)
+        moved = np.full(len(self._alive), -1, dtype=np.int64)
+        moved[keep] = np.arange(len(keep))
+        live = self._batch[keep]
+        used, place_index = np.unique(live.place_index, return_inverse=True)
+        places = [live.places[i] for i in used]
+        live.place_index = place_index.astype(np.int32).reshape(-1)
+        live.places = places
+        self._batch = live
+        self._place_codes = {place: code for code, place in enumerate(places)}
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._rows = {event_id: int(moved[row]) for event_id, row in self._rows.items()}
+
+    def within(
+        self, lat: float, lon: float, radius_km: float, *, min_mag: float | None = None
+    ) -> Tuple[np.ndarray, QuakeBatch]:
+        """
+        Events within ``radius_km`` of a point, nearest first, and their distances in km.
+        """
+        batch = self._batch
+        keep = self._alive.copy()
+        if min_mag is not None:
+            # NaN (unknown) magnitudes never match.
+            keep &= batch.magnitude >= min_mag
+        lat_span = radius_km / KM_PER_DEG_LAT
+        keep &= (batch.lat >= lat - lat_span) & (batch.lat <= lat + lat_span)
+        cos_lat = min(math.cos(math.radians(lat - lat_span)), math.cos(math.radians(lat + lat_span)))
+        if lat + lat_span < 90 and lat - lat_span > -90 and cos_lat > 1e-6:
+            lon_span = radius_km / (KM_PER_DEG_LAT * cos_lat)
+            if lon_span < 180:
+                keep &= np.abs((batch.lon - lon + 180) % 360 - 180) <= lon_span
+
+        rows = np.flatnonzero(keep)
+        distances = _haversine_km_many(lat, lon, batch.lat[rows], batch.lon[rows])
+        close = distances <= radius_km
+        rows, distances = rows[close], distances[close]
+        order = np.argsort(distances, kind="stable")
+        return distances[order], batch[rows[order]]
+
+    def nearest(
+        self, lat: float, lon: float, *, k: int = 1, min_mag: float | None = None
+    ) -> Tuple[np.ndarray, QuakeBatch]:
+        """
+        The ``k`` nearest events, widening the search radius until enough are found.
+        """
+        radius = 250.0
+        while True:
+            distances, hits = self.within(lat, lon, radius, min_mag=min_mag)
+            if len(hits) >= k or radius >= math.pi * EARTH_RADIUS_KM:
+                return distances[:k], hits[:k]
+            radius *= 2
+
+
+def _same_magnitude(magnitude: Any, previous: float | None) -> bool:
+    # Stored magnitudes are float32, so compare at the 0.001 USGS reports.
+    if not isinstance(magnitude, (int, float)):
+        return previous is None
+    return previous is not None and abs(magnitude - previous) < 5e-4
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import heapq
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+FEED_FLAGS: Dict[str, str] = {
+    "earthquake": "earthquake_feed_enabled",
+    "weather": "weather_feed_enabled",
+    "iss": "iss_feed_enabled",
+}
+MIN_INTERVAL_HOURS = 0.25
+
+
+class FeedScheduler:
+    """
+    Min-heap of per-guild, per-feed due times.
+
+    Each guild/feed pair gets a stable phase inside its interval (derived
+    from a hash of its id), so guilds sharing an interval are spread across
+    the period instead of all firing on the same tick. Rescheduling a guild
+    bumps its generation; superseded heap entries are skipped lazily and
+    compacted once they outnumber live ones.
+    """
+
+    def __init__(self, *, default_hours: float = 4, clock: Callable[[], float] = time.time) -> None:
+        self.default_hours = default_hours
+        self._clock = clock
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._generation: Dict[int, int] = {}
+        self._intervals: Dict[int, float] = {}
+        self._feed_counts: Dict[int, int] = {}
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def schedule(self, guild_id: int, config: Mapping[str, Any]) -> None:
+        """
+        (Re)schedule every enabled feed for a guild from its config.
+        """
+        self.remove(guild_id)
+        generation = self._generation[guild_id] = self._generation.get(guild_id, 0) + 1
+        try:
+            hours = float(config.get("interval") or self.default_hours)
+        except (TypeError, ValueError):
+            hours = self.default_hours
+        interval = max(hours, MIN_INTERVAL_HOURS) * 3600
+        self._intervals[guild_id] = interval
+        now = self._clock()
+        count = 0
+        for feed, flag in FEED_FLAGS.items():
+            if not config.get(flag):
+                continue
+            heapq.heappush(self._heap, (self._next_slot(guild_id, feed, interval, now), guild_id, feed, generation))
+            count += 1
+        self._feed_counts[guild_id] = count
+        self._live += count
+        self._maybe_compact()
+
+    def remove(self, guild_id: int) -> None:
+        if guild_id not in self._intervals:
+            return
+        self._generation[guild_id] += 1
+        del self._intervals[guild_id]
+        self._live -= self._feed_counts.pop(guild_id, 0)
+
+    def due(self) -> List[Tuple[int, str]]:
+        """
+        Pop every guild/feed pair that is due and queue its next run.
+        """
+        now = self._clock()
+        ready: List[Tuple[int, str]] = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, guild_id, feed, generation = heapq.heappop(self._heap)
+            if generation != self._generation.get(guild_id):
+                continue
+            ready.append((guild_id, feed))
+            interval = self._intervals[guild_id]
+            next_at = due_at + interval
+            if next_at <= now:  # slept through several periods; don't replay them
+                next_at = self._next_slot(guild_id, feed, interval, now)
+            heapq.heappush(self._heap, (next_at, guild_id, feed, generation))
+        return ready
+
+    def next_due(self) -> float | None:
+        return self._heap[0][0] if self._heap else None
+
+    @staticmethod
+    def _next_slot(guild_id: int, feed: str, interval: float, now: float) -> float:
+        phase = (zlib.crc32(f"{guild_id}:{feed}".encode()) / 0xFFFFFFFF) * interval
+        return now + ((phase - now) % interval or interval)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > 2 * self._live + 64:
+            self._heap = [
+                entry for entry in self._heap if entry[3] == self._generation.get(entry[1])
+            ]
+            heapq.heapify(self._heap)
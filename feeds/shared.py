@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+DB_PATH = Path("data/shared_feed.db")
+
+# Channels in the log.
+QUAKE_DELTAS = "quake_deltas"  # new/updated events from the hourly feed, for alerts
+QUAKE_INDEX = "quake_index"  # day/week/month window deltas, for /disaster near
+ISS_POSITION = "iss_position"
+
+log = logging.getLogger(__name__)
+
+
+class SharedFeedLog:
+    """
+    Append-only log of upstream data in SQLite (WAL).
+
+    The coordinator process publishes what it fetched from USGS and Open
+    Notify; worker processes on the same host tail the log by sequence
+    number instead of polling the upstreams themselves, so adding shards
+    does not add upstream traffic. Small per-feed state, such as the HTTP
+    validators of the last response, is kept beside the log so whichever
+    process polls next can pick up where the last one stopped.
+    """
+
+    def __init__(self, path: Path = DB_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS feed_log ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, "
+                "published_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_feed_log_channel ON feed_log (channel, seq)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS feed_state ("
+                "name TEXT PRIMARY KEY, updated_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+
+    def publish(self, channel: str, items: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append ``items`` to ``channel``; returns how many were written.
+        """
+        now = time.time()
+        rows = [(channel, now, json.dumps(item, separators=(",", ":"))) for item in items]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO feed_log (channel, published_at, payload) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def read(self, channel: str, after: int = 0, limit: int = 10000) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Items published to ``channel`` after sequence ``after``, and the last sequence read.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, payload FROM feed_log WHERE channel = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (channel, after, limit),
+            ).fetchall()
+        if not rows:
+            return after, []
+        return rows[-1][0], [json.loads(payload) for _, payload in rows]
+
+    def last_seq(self, channel: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM feed_log WHERE channel = ?", (channel,)).fetchone()
+        return row[0] or 0
+
+    def latest(self, channel: str, max_age: float | None = None) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT published_at, payload FROM feed_log WHERE channel = ? ORDER BY seq DESC LIMIT 1",
+                (channel,),
+            ).fetchone()
+        if row is None or (max_age is not None and time.time() - row[0] > max_age):
+            return None
+        return json.loads(row[1])
+
+    def prune(self, channel: str, older_than: float) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM feed_log WHERE channel = ? AND published_at < ?", (channel, older_than)
+            )
+        return cursor.rowcount
+
+    def save_state(self, name: str, state: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_state (name, updated_at, payload) VALUES (?, ?, ?)",
+                (name, time.time(), json.dumps(state, separators=(",", ":"))),
+            )
+
+    def load_state(self, name: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM feed_state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+
+_log: SharedFeedLog | None = None
+
+
+def get_shared_log() -> SharedFeedLog:
+    global _log
+    if _log is None:
+        _log = SharedFeedLog()
+    return _log
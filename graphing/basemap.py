@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
+from matplotlib.colors import Normalize
+
+matplotlib.use("Agg")
+
+log = logging.getLogger(__name__)
+
+# Natural Earth 110m coastline (public domain), shipped in graphing/data; COASTLINE_GEOJSON overrides it.
+COASTLINE_PATH = Path(
+    os.getenv("COASTLINE_GEOJSON", str(Path(__file__).parent / "data" / "ne_110m_coastline.geojson"))
+)
+
+THEMES: Dict[str, Dict[str, str]] = {
+    "light": {"figure": "white", "axes": "white", "text": "black", "grid": "#d0d0d0", "coast": "#7a7a7a"},
+    "dark": {"figure": "white", "axes": "#0b1224", "text": "black", "grid": "#1f2a44", "coast": "#4b5d80"},
+}
+
+
+@dataclass(frozen=True)
+class ColorScale:
+    cmap: str
+    vmin: float
+    vmax: float
+    label: str
+
+
+@dataclass
+class Basemap:
+    fig: Any
+    ax: Any
+    background: Any
+    dpi: int
+
+
+_basemaps: Dict[Tuple[Any, ...], Basemap] = {}
+_coastline: List[Sequence[Sequence[float]]] | None = None
+
+
+def _coastline_segments() -> List[Sequence[Sequence[float]]]:
+    global _coastline
+    if _coastline is not None:
+        return _coastline
+    _coastline = []
+    if not COASTLINE_PATH.exists():
+        return _coastline
+    try:
+        payload = json.loads(COASTLINE_PATH.read_text(encoding="utf-8"))
+    except Exception as exc:
+        log.warning("Could not read coastline %s: %s", COASTLINE_PATH, exc)
+        return _coastline
+    for feature in payload.get("features", []):
+        geometry = feature.get("geometry") or {}
+        kind, coords = geometry.get("type"), geometry.get("coordinates", [])
+        if kind == "LineString":
+            _coastline.append(coords)
+        elif kind in ("MultiLineString", "Polygon"):
+            _coastline.extend(coords)
+        elif kind == "MultiPolygon":
+            for polygon in coords:
+                _coastline.extend(polygon)
+    return _coastline
+
+
+def get_basemap(
+    theme: str,
+    figsize: Tuple[float, float],
+    dpi: int,
+    scale: ColorScale | None = None,
+) -> Basemap:
+    """
+    Return the cached world frame for a theme/size, drawing it on first use.
+
+    Everything static (limits, labels, graticule, coastline, colorbar) is
+    rendered once; the title is left animated so it is drawn per request.
+    """
+    key = (theme, figsize, dpi, scale)
+    basemap = _basemaps.get(key)
+    if basemap is not None:
+        return basemap
+
+    colors = THEMES.get(theme, THEMES["light"])
+    fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+    fig.set_facecolor(colors["figure"])
+    ax.set_facecolor(colors["axes"])
+    ax.set_xlim(-180, 180)
+    ax.set_ylim(-90, 90)
+    ax.set_xlabel("Longitude", color=colors["text"])
+    ax.set_ylabel("Latitude", color=colors["text"])
+    ax.grid(True, color=colors["grid"], linewidth=0.5)
+    ax.set_axisbelow(True)
+    segments = _coastline_segments()
+    if segments:
+        ax.add_collection(LineCollection(segments, colors=colors["coast"], linewidths=0.6))
+    if scale is not None:
+        mappable = ScalarMappable(norm=Normalize(scale.vmin, scale.vmax), cmap=scale.cmap)
+        fig.colorbar(mappable, ax=ax, label=scale.label)
+    ax.set_title(" ")
+    ax.title.set_animated(True)
+    fig.tight_layout()
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+
+    basemap = Basemap(fig=fig, ax=ax, background=background, dpi=dpi)
+    _basemaps[key] = basemap
+    return basemap
+
+
+def render_markers(
+    basemap: Basemap,
+    title: str,
+    lons: Sequence[float],
+    lats: Sequence[float],
+    **scatter_kwargs: Any,
+) -> bytes:
+    """
+    Composite markers and a title onto a cached basemap and return PNG bytes.
+    """
+    canvas = basemap.fig.canvas
+    canvas.restore_region(basemap.background)
+    basemap.ax.title.set_text(title)
+    markers = basemap.ax.scatter(lons, lats, animated=True, **scatter_kwargs)
+    try:
+        basemap.ax.draw_artist(markers)
+        basemap.ax.draw_artist(basemap.ax.title)
+        buf = io.BytesIO()
+        plt.imsave(buf, canvas.buffer_rgba(), format="png", dpi=basemap.dpi)
+    finally:
+        markers.remove()
+    return buf.getvalue()
@@ -1,32 +1,46 @@
 from __future__ import annotations
 
-import tempfile
-from pathlib import Path
-from typing import Iterable, Mapping
+from typing import Iterable, Mapping, Union
 
-import matplotlib
-import matplotlib.pyplot as plt
-matplotlib.use("Agg")
+import numpy as np
 
+from api_clients.quake_batch import QuakeBatch
+from graphing.basemap import ColorScale, get_basemap, render_markers
 
-def world_heatmap(points: Iterable[Mapping[str, float]], title: str) -> Path:
+# Fixed so the colorbar can live on the cached basemap.
+INTENSITY_SCALE = ColorScale(cmap="coolwarm", vmin=0.0, vmax=8.0, label="Intensity")
+
+
+def world_heatmap(
+    points: Union[QuakeBatch, Iterable[Mapping[str, float]]], title: str, *, theme: str = "dark"
+) -> bytes:
     """
     Create a simple scatter-style heat map for lat/lon intensity points.
+
+    A ``QuakeBatch`` is plotted straight from its columns, coloured by magnitude.
     """
-    lats = [p.get("lat") for p in points if p.get("lat") is not None]
-    lons = [p.get("lon") for p in points if p.get("lon") is not None]
-    mag = [p.get("value", 1) for p in points if p.get("lat") is not None]
-
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.set_facecolor("#0b1224")
-    scatter = ax.scatter(lons, lats, c=mag, cmap="coolwarm", alpha=0.7)
-    ax.set_title(title)
-    ax.set_xlabel("Longitude")
-    ax.set_ylabel("Latitude")
-    fig.colorbar(scatter, ax=ax, label="Intensity")
-    fig.tight_layout()
-
-    out_path = Path(tempfile.gettempdir()) / "geolive_heatmap.png"
-    fig.savefig(out_path, dpi=200)
-    plt.close(fig)
-    return out_path
+    if isinstance(points, QuakeBatch):
+        lats, lons, mag = points.lat, points.lon, points.magnitude
+        located = np.isfinite(lats) & np.isfinite(lons)
+        if not located.all():
+            lats, lons, mag = lats[located], lons[located], mag[located]
+        if np.isnan(mag).any():
+            mag = np.nan_to_num(mag, nan=1.0)
+    else:
+        points = [p for p in points if p.get("lat") is not None and p.get("lon") is not None]
+        lats = [p["lat"] for p in points]
+        lons = [p["lon"] for p in points]
+        mag = [p.get("value", 1) for p in points]
+
+    basemap = get_basemap(theme, (8, 4), 200, INTENSITY_SCALE)
+    return render_markers(
+        basemap,
+        title,
+        lons,
+        lats,
+        c=mag,
+        cmap=INTENSITY_SCALE.cmap,
+        vmin=INTENSITY_SCALE.vmin,
+        vmax=INTENSITY_SCALE.vmax,
+        alpha=0.7,
+    )
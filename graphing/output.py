@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+from typing import IO, Any
+
+# Images above this size are spooled to a temp file instead of held in memory.
+SPILL_BYTES = int(os.getenv("PNG_SPILL_BYTES", str(8 * 1024 * 1024)))
+
+
+def figure_png(fig: Any, **savefig_kwargs: Any) -> bytes:
+    """
+    Render a matplotlib figure to PNG bytes without touching the filesystem.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", **savefig_kwargs)
+    return buf.getvalue()
+
+
+def png_stream(data: bytes) -> IO[bytes]:
+    """
+    Wrap PNG bytes in a file object suitable for ``discord.File``.
+    """
+    if len(data) <= SPILL_BYTES:
+        return io.BytesIO(data)
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPILL_BYTES)
+    spooled.write(data)
+    spooled.seek(0)
+    return spooled
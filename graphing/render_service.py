@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import logging
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from functools import partial
+from multiprocessing.queues import SimpleQueue
+from typing import Any, Callable, List, Union
+
+import metrics
+from api_clients.cache import AsyncTTLCache
+from config import Settings
+
+log = logging.getLogger(__name__)
+
+RENDER_SECONDS = metrics.histogram(
+    "geolive_render_seconds", "Graph render time, including queueing.", ["fn", "outcome"]
+)
+RENDER_REJECTED = metrics.counter("geolive_render_rejected_total", "Renders refused by a full queue.")
+RENDER_PENDING = metrics.gauge("geolive_render_pending", "Render jobs queued or running.")
+
+
+class RenderError(Exception):
+    pass
+
+
+class RenderQueueFull(RenderError):
+    pass
+
+
+class RenderTimeout(RenderError):
+    pass
+
+
+def _warm_worker() -> None:
+    """
+    Import the plotting stack once per worker so the first job is not slowed down by it.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+    import graphing.earthquake_map  # noqa: F401
+    import graphing.heatmap  # noqa: F401
+    import graphing.weather_graph  # noqa: F401
+
+
+def _start_worker(pids: SimpleQueue) -> None:
+    # Report in so a hung worker can be killed; the executor does not expose its processes.
+    pids.put(os.getpid())
+    _warm_worker()
+
+
+def _noop() -> None:
+    return None
+
+
+# A chart function, or its "module:function" path so callers need not import
+# the plotting stack themselves.
+RenderTarget = Union[Callable[..., Any], str]
+
+
+def _resolve(target: RenderTarget) -> Callable[..., Any]:
+    if callable(target):
+        return target
+    module, _, name = target.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _target_name(target: RenderTarget) -> str:
+    return target.partition(":")[2] if isinstance(target, str) else target.__name__
+
+
+def _call(target: RenderTarget, args: tuple, kwargs: dict) -> Any:
+    return _resolve(target)(*args, **kwargs)
+
+
+class RenderService:
+    """
+    Runs blocking matplotlib renders in a worker process pool.
+
+    ``render`` rejects work once ``max_pending`` jobs are queued or running and
+    gives up on a job after ``timeout`` seconds, so a slow chart can never stall
+    the gateway loop. A timed-out job or a dead worker replaces the pool, so a
+    hung or crashed render does not block the ones after it.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 1,
+        max_pending: int = 16,
+        timeout: float = 30.0,
+        cache_entries: int = 128,
+    ) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._worker_pids: SimpleQueue | None = None
+        self._pending = 0
+        self._results = AsyncTTLCache(max_entries=cache_entries)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RenderService":
+        return cls(
+            workers=settings.render_workers,
+            max_pending=settings.render_max_pending,
+            timeout=settings.render_timeout,
+            cache_entries=settings.render_cache_entries,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        # spawn keeps the gateway's sockets and event loop out of the workers.
+        context = multiprocessing.get_context("spawn")
+        self._worker_pids = context.SimpleQueue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_start_worker,
+            initargs=(self._worker_pids,),
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_noop)
+        log.info("Render service started with %d worker(s)", self.workers)
+
+    async def render(self, fn: RenderTarget, *args: Any, **kwargs: Any) -> Any:
+        if self._pending >= self.max_pending:
+            RENDER_REJECTED.inc()
+            raise RenderQueueFull(f"Render queue full ({self.max_pending} jobs pending).")
+        self.start()
+        executor = self._executor
+        self._pending += 1
+        RENDER_PENDING.set(self._pending)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(executor, partial(_call, fn, args, kwargs))
+            result = await asyncio.wait_for(future, self.timeout)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError as exc:
+            outcome = "timeout"
+            # The abandoned job still occupies its worker process.
+            self._recycle(executor, terminate=True)
+            raise RenderTimeout(f"{_target_name(fn)} did not finish within {self.timeout:.0f}s.") from exc
+        except BrokenExecutor as exc:
+            outcome = "crashed"
+            self._recycle(executor)
+            raise RenderError(f"Render worker died while running {_target_name(fn)}.") from exc
+        finally:
+            self._pending -= 1
+            RENDER_PENDING.set(self._pending)
+            RENDER_SECONDS.observe(time.perf_counter() - started, fn=_target_name(fn), outcome=outcome)
+
+    async def render_cached(self, fn: RenderTarget, *args: Any, **kwargs: Any) -> Any:
+        """
+        Like ``render``, but identical calls share one job and reuse its result.
+        """
+        name = fn if isinstance(fn, str) else f"{fn.__module__}:{fn.__qualname__}"
+        payload = pickle.dumps((name, args, sorted(kwargs.items())))
+        key = hashlib.sha1(payload).hexdigest()
+        return await self._results.get_or_fetch(
+            key, lambda: self.render(fn, *args, **kwargs), ttl=None
+        )
+
+    def _recycle(self, executor: ProcessPoolExecutor | None, *, terminate: bool = False) -> None:
+        """
+        Drop ``executor`` and let the next render start a fresh pool.
+
+        ``terminate`` also kills its workers, for a job that is still running.
+        A broken pool has already stopped its own; jobs that were running on
+        it fail with ``BrokenExecutor`` and pass the old executor here too,
+        which is then a no-op.
+        """
+        if executor is None or executor is not self._executor:
+            return
+        pids = self._drain_worker_pids()
+        self._executor = None
+        log.warning("Restarting render workers")
+        executor.shutdown(wait=False, cancel_futures=True)
+        if not terminate:
+            return
+        # shutdown() does not stop a process stuck in a job.
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def _drain_worker_pids(self) -> List[int]:
+        queue, self._worker_pids = self._worker_pids, None
+        pids: List[int] = []
+        if queue is not None:
+            while not queue.empty():
+                pids.append(queue.get())
+            queue.close()
+        return pids
+
+    def clear_cache(self) -> None:
+        self._results.clear()
+
+    async def close(self) -> None:
+        executor, self._executor = self._executor, None
+        self._drain_worker_pids()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
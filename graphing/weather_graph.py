@@ -1,34 +1,58 @@
 from __future__ import annotations
 
-import tempfile
-from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Sequence
 
 import matplotlib
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
+
+from graphing.downsample import downsample
+from graphing.output import figure_png
 
 matplotlib.use("Agg")
 
+MAX_POINTS = 400
+
+
+def _series(values: Sequence[float | None]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
 
 def create_weather_graph(
     times: Sequence[str],
     temps: Sequence[float],
     dewpoints: Sequence[float],
     location_name: str,
-) -> Path:
+    *,
+    max_points: int = MAX_POINTS,
+) -> bytes:
     """
     Render temperature vs. dew point graph with light styling.
+
+    ``times`` are WeatherAPI local timestamps ("YYYY-MM-DD HH:MM"); long
+    series are LTTB-downsampled to ``max_points`` so a month renders as
+    quickly as a day.
     """
+    minutes = np.array(times, dtype="datetime64[m]").astype(np.int64).astype(np.float64)
+    temp_x, temp_y = downsample(minutes, _series(temps), max_points)
+    dew_x, dew_y = downsample(minutes, _series(dewpoints), max_points)
+    temp_t = temp_x.astype(np.int64).astype("datetime64[m]")
+    dew_t = dew_x.astype(np.int64).astype("datetime64[m]")
+
     fig, ax = plt.subplots(figsize=(9, 4.5))
     ax.set_facecolor("#f9f9f9")
 
     # Temperature line and area fill
-    ax.fill_between(times, temps, color="#b8f5b1", alpha=0.7, label="Temperature")
-    ax.plot(times, temps, color="#2f7d32", linewidth=2.2)
+    ax.fill_between(temp_t, temp_y, color="#b8f5b1", alpha=0.7, label="Temperature")
+    ax.plot(temp_t, temp_y, color="#2f7d32", linewidth=2.2)
 
     # Dew point line
-    ax.plot(times, dewpoints, color="#d62828", linewidth=2, label="Dew point")
+    ax.plot(dew_t, dew_y, color="#d62828", linewidth=2, label="Dew point")
 
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
     ax.set_title(f"Temperature / Dew Point – {location_name}", fontsize=14, color="#1f2937")
     ax.set_xlabel("Time")
     ax.set_ylabel("°C")
@@ -37,8 +61,6 @@ def create_weather_graph(
     fig.autofmt_xdate(rotation=45)
     fig.tight_layout()
 
-    out_path = Path("temp") / "graph.png"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_path, dpi=220, bbox_inches="tight")
+    png = figure_png(fig, dpi=220, bbox_inches="tight")
     plt.close(fig)
-    return out_path
+    return png
@@ -1,34 +1,182 @@
 import asyncio
+import hashlib
+import json
 import logging
-from typing import List
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
 
 import discord
 from discord.ext import commands
 import sentry_sdk
 
-from config import Settings, load_settings
+import metrics
+from api_clients import persistent_cache, weatherapi
+from api_clients.http import HttpClients
+from config import BOT_ROLES, Settings, load_settings
+from feeds.leader import AUTO_FEED_LEASE, UPSTREAM_LEASE, LeaseKeeper
+from graphing.render_service import RenderService
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 
+STARTUP_SECONDS = metrics.gauge("geolive_startup_seconds", "Time spent in each startup phase.", ["phase"])
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase took, as consecutive laps.
+    """
+
+    def __init__(self) -> None:
+        self.started = self._last = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.reported = False
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> None:
+        total = time.perf_counter() - self.started
+        for phase, seconds in self.phases:
+            STARTUP_SECONDS.set(seconds, phase=phase)
+        STARTUP_SECONDS.set(total, phase="total")
+        logging.info(
+            "Startup took %.2fs: %s",
+            total,
+            ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in self.phases),
+        )
+        self.reported = True
+
+
+class GeoLiveBot(commands.AutoShardedBot):
+    """
+    Runs either every shard (``SHARD_COUNT`` unset: Discord's recommendation)
+    or the ``SHARD_IDS`` slice of ``SHARD_COUNT`` shards, so shard ranges can
+    be split across processes. ``BOT_ROLE`` decides who polls the upstreams;
+    see ``feeds.shared``.
+    """
 
-class GeoLiveBot(commands.Bot):
     def __init__(self, settings: Settings, extensions: List[str]) -> None:
+        self.startup = StartupTimer()
+        if settings.bot_role not in BOT_ROLES:
+            raise RuntimeError(f"BOT_ROLE must be one of {', '.join(BOT_ROLES)}, not {settings.bot_role!r}.")
+        if settings.shard_ids and not settings.shard_count:
+            raise RuntimeError("SHARD_IDS needs SHARD_COUNT to be set.")
         intents = discord.Intents.default()
-        super().__init__(command_prefix="!", intents=intents)
+        super().__init__(
+            command_prefix="!",
+            intents=intents,
+            shard_count=settings.shard_count,
+            shard_ids=settings.shard_ids,
+        )
         self.settings = settings
         self.extensions_to_load = extensions
+        self.http_clients = HttpClients.from_settings(settings)
+        self.renderer = RenderService.from_settings(settings)
+        self.metrics_runner = None
+        self.leases: Dict[str, LeaseKeeper] = {}
+        if settings.leader_election:
+            # Replicas share upstream data through the feed log, like a coordinator does.
+            if settings.bot_role == "standalone":
+                settings.bot_role = "coordinator"
+            shards = ",".join(map(str, settings.shard_ids)) if settings.shard_ids else "all"
+            self.leases = {
+                UPSTREAM_LEASE: LeaseKeeper(UPSTREAM_LEASE, ttl=settings.leader_lease_seconds),
+                AUTO_FEED_LEASE: LeaseKeeper(f"{AUTO_FEED_LEASE}:{shards}", ttl=settings.leader_lease_seconds),
+            }
+        self.startup.lap("init")
+
+    def is_leader(self, lease: str) -> bool:
+        """
+        Whether this process holds ``lease``; always true without leader election.
+        """
+        keeper = self.leases.get(lease)
+        return keeper is None or keeper.held
 
     async def setup_hook(self) -> None:
+        self.startup.lap("login")
+        # Workers import matplotlib in the background; cogs only reference charts by path.
+        self.renderer.start()
+        self.startup.lap("render pool")
+        if self.settings.metrics_port:
+            try:
+                self.metrics_runner = await metrics.serve(self.settings.metrics_port, self.settings.metrics_host)
+            except OSError as exc:
+                logging.warning("Could not start metrics endpoint: %s", exc)
+            self.startup.lap("metrics")
+        persistent_cache.configure(max_bytes=self.settings.response_cache_max_mb * 1024 * 1024)
+        for keeper in self.leases.values():
+            await keeper.start()
+        if self.leases:
+            self.startup.lap("leases")
+        self._warm_task = asyncio.create_task(self._warm_caches())
         for ext in self.extensions_to_load:
             try:
                 await self.load_extension(ext)
                 logging.info("Loaded extension %s", ext)
             except Exception as exc:
                 logging.exception("Failed to load extension %s: %s", ext, exc)
+            self.startup.lap(ext)
+        await self._sync_commands()
+
+    async def on_ready(self) -> None:
+        if not self.startup.reported:
+            self.startup.lap("gateway")
+            self.startup.report()
+
+    async def _warm_caches(self) -> None:
+        started = time.perf_counter()
+        try:
+            warmed = await weatherapi.warm_cache()
+        except Exception as exc:
+            logging.warning("Could not warm response cache: %s", exc)
+            return
+        logging.info("Warmed %d cached responses from disk in %.0fms", warmed, (time.perf_counter() - started) * 1000)
+
+    def _command_tree_hash(self) -> str:
+        payload = {
+            "application_id": self.application_id,
+            "commands": [command.to_dict(self.tree) for command in self.tree.get_commands()],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def _sync_commands(self) -> None:
+        """
+        Push the command tree to Discord only when it differs from the last sync.
+        """
+        digest = self._command_tree_hash()
+        # Must outlive deploys to save anything; see fly.toml for the volume.
+        hash_path = Path(self.settings.command_hash_path)
+        try:
+            previous = hash_path.read_text().strip()
+        except OSError:
+            previous = None
+        if previous == digest and not self.settings.force_command_sync:
+            logging.info("Command tree unchanged, skipping sync")
+            self.startup.lap("command sync (skipped)")
+            return
         await self.tree.sync()
+        try:
+            hash_path.parent.mkdir(parents=True, exist_ok=True)
+            hash_path.write_text(digest)
+        except OSError as exc:
+            logging.warning("Could not store command tree hash in %s: %s", hash_path, exc)
+        self.startup.lap("command sync")
+
+    async def close(self) -> None:
+        # Release leases first so a standby can take over right away.
+        for keeper in self.leases.values():
+            await keeper.stop()
+        await super().close()
+        await self.http_clients.aclose()
+        await self.renderer.close()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
 
 
 def build_bot() -> GeoLiveBot: